@@ -0,0 +1,249 @@
+"""Screen a folder or zip of CV PDFs against one job description, without the API.
+
+    python -m app.batch_screen --cvs ./cvs --jd job.txt --output results.jsonl
+    python -m app.batch_screen --cvs cvs.zip --jd job.txt --output results.parquet
+
+CVs are streamed in a fixed order: PDFs are parsed in a process pool with a
+bounded number in flight, skills are extracted a batch at a time and every
+batch is appended to the output before the checkpoint moves on. Running the
+same command again after a crash continues after the last finished batch.
+A .parquet output is a directory of part files, one per batch (needs pyarrow).
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import services.read_resume
+from models.cv_schema import extract_skills_for_cv_texts
+from models.job_description_schema import extract_skills_for_jd
+from utils.semantic_matcher import get_semantic_matcher
+from utils.text_utils import STATUS_FIELDS, build_compact_report, build_matching_table
+
+_archives = {}
+
+
+def iter_cv_sources(path):
+    """(name, source) for every PDF in a directory tree or a zip, always in the same order."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            names = sorted(name for name in archive.namelist() if name.lower().endswith(".pdf"))
+        for name in names:
+            yield name, (path, name)
+        return
+
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.lower().endswith(".pdf"):
+                full_path = os.path.join(root, file)
+                yield os.path.relpath(full_path, path), full_path
+
+def _init_worker():
+    # each worker is already one of the parallel readers, no pool inside it
+    services.read_resume.PAGE_WORKERS = 1
+
+def _read_cv(item):
+    name, source = item
+    try:
+        if isinstance(source, tuple):
+            archive_path, member = source
+            archive = _archives.get(archive_path)
+            if archive is None:
+                archive = _archives[archive_path] = zipfile.ZipFile(archive_path)
+            source = archive.read(member)
+        return name, services.read_resume.read_resume(source), None
+    except Exception as e:
+        return name, None, repr(e)
+
+def _bounded_map(executor, func, items, window):
+    # like executor.map, but only `window` items are read ahead
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _empty_record(name, error=None):
+    record = {"cv": name, "final_score": None, "decision": None, "recommendation": None}
+    record.update({field: [] for field in STATUS_FIELDS.values()})
+    record["error"] = error
+    return record
+
+def build_record(name, jd_skills, cv_skills, semantic_matcher=None):
+    matching = build_matching_table(jd_skills, cv_skills, semantic_matcher)
+    report = build_compact_report(matching)
+
+    record = _empty_record(name)
+    record["final_score"] = report["final_score"]
+    record["decision"] = report["decision"]
+    record["recommendation"] = report["recommendation"]
+    record.update(report["skills"])
+    return record
+
+def _extract_batch(texts):
+    try:
+        return extract_skills_for_cv_texts(texts)
+    except Exception:
+        # one unparseable CV should not fail the rest of the batch
+        outputs = []
+        for text in texts:
+            try:
+                outputs.append(extract_skills_for_cv_texts([text])[0])
+            except Exception as e:
+                outputs.append(e)
+        return outputs
+
+def screen_batch(batch, jd_skills, semantic_matcher=None):
+    readable = [text for _, text, error in batch if error is None]
+    skills = iter(_extract_batch(readable) if readable else [])
+
+    records = []
+    for name, text, error in batch:
+        if error is not None:
+            records.append(_empty_record(name, error))
+            continue
+        cv_skills = next(skills)
+        if isinstance(cv_skills, Exception):
+            records.append(_empty_record(name, repr(cv_skills)))
+        else:
+            records.append(build_record(name, jd_skills, cv_skills, semantic_matcher))
+    return records
+
+def screen(sources, jd_skills, executor, batch_size=16, window=32, semantic_matcher=None):
+    """Yield a list of result records per batch of CVs."""
+    batch = []
+    for item in _bounded_map(executor, _read_cv, sources, window):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield screen_batch(batch, jd_skills, semantic_matcher)
+            batch = []
+    if batch:
+        yield screen_batch(batch, jd_skills, semantic_matcher)
+
+
+class JsonlWriter:
+    """Appends records to a JSONL file; position() is the byte offset of the last full batch."""
+
+    def __init__(self, path, position=0):
+        self.file = open(path, "a+b")
+        # anything after the checkpoint comes from a batch that did not finish
+        self.file.truncate(position)
+        self.file.seek(position)
+
+    def write(self, records):
+        for record in records:
+            self.file.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def position(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Writes each batch as one part file in the output directory; position() is the part count."""
+
+    def __init__(self, path, position=0):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.parts = position
+        self.schema = pa.schema(
+            [("cv", pa.string()), ("final_score", pa.float64()), ("decision", pa.string()), ("recommendation", pa.string())]
+            + [(field, pa.list_(pa.string())) for field in STATUS_FIELDS.values()]
+            + [("error", pa.string())]
+        )
+        os.makedirs(path, exist_ok=True)
+        for file in os.listdir(path):
+            if file.startswith("part-") and int(file[5:10]) >= position:
+                os.remove(os.path.join(path, file))
+
+    def write(self, records):
+        table = self.pa.Table.from_pylist(records, schema=self.schema)
+        self.pq.write_table(table, os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+
+    def position(self):
+        return self.parts
+
+    def close(self):
+        pass
+
+
+def load_checkpoint(path, fingerprint):
+    if not os.path.exists(path):
+        return {"fingerprint": fingerprint, "done": 0, "position": 0}
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state["fingerprint"] != fingerprint:
+        raise SystemExit(f"{path} belongs to another input or job description, pass --restart to start over")
+    return state
+
+def save_checkpoint(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", required=True, help="directory or zip file of CV PDFs")
+    parser.add_argument("--jd", required=True, help="text file with the job description")
+    parser.add_argument("--output", required=True, help="results.jsonl or results.parquet")
+    parser.add_argument("--checkpoint", help="default: <output>.checkpoint")
+    parser.add_argument("--batch-size", type=int, default=16, help="CVs per extraction batch and per checkpoint")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes parsing PDFs")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    with open(args.jd, encoding="utf-8") as f:
+        jd_text = f.read()
+
+    output = args.output.rstrip("/")
+    checkpoint_path = args.checkpoint or output + ".checkpoint"
+    fingerprint = hashlib.sha256(f"{os.path.abspath(args.cvs)}\x00{output}\x00{jd_text}".encode("utf-8")).hexdigest()
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    state = load_checkpoint(checkpoint_path, fingerprint)
+
+    writer_class = ParquetWriter if output.endswith(".parquet") else JsonlWriter
+    writer = writer_class(output, state["position"])
+    sources = itertools.islice(iter_cv_sources(args.cvs), state["done"], None)
+    if state["done"]:
+        print(f"resuming after {state['done']} CVs", flush=True)
+
+    # spawn: the workers only parse PDFs and must not inherit the model
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    try:
+        jd_skills = extract_skills_for_jd(jd_text)
+        semantic_matcher = get_semantic_matcher()
+        for records in screen(sources, jd_skills, executor, args.batch_size, args.workers * 4, semantic_matcher):
+            writer.write(records)
+            state["done"] += len(records)
+            state["position"] = writer.position()
+            save_checkpoint(checkpoint_path, state)
+            print(f"{state['done']} CVs screened", flush=True)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
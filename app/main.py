@@ -1,3 +1,4 @@
+import time
 import streamlit as st
 import requests
 import pandas as pd
@@ -71,7 +72,28 @@ st.markdown("""
 # =========================
 # Backend URL
 # =========================
-NGROK_URL = "NGROK_URL_HERE/analyze"
+NGROK_URL = "NGROK_URL_HERE"
+POLL_INTERVAL = 2      # seconds between status checks
+MAX_WAIT = 15 * 60     # give up after this many seconds
+
+# the API sends skill names grouped by status, the labels are added here
+SKILL_GROUPS = [
+    ("matched", "✅ Match", "Matched"),
+    ("partial", "🟡 Partial Match", "Partial Match"),
+    ("related", "🔵 Related Skill", "Related Skill"),
+    ("missing", "❌ Missing", "Missing"),
+]
+
+def matching_rows(skills):
+    return [
+        {"Skill": skill, "Status": status, "Action Needed": "No Action Needed" if group == "matched" else "Improve / Learn"}
+        for group, status, _ in SKILL_GROUPS
+        for skill in skills.get(group, [])
+    ]
+
+def summary_rows(skills):
+    rows = [{"Match Type": label, "Count": len(skills.get(group, []))} for group, _, label in SKILL_GROUPS]
+    return sorted((row for row in rows if row["Count"]), key=lambda row: -row["Count"])
 
 # =========================
 # Inputs Section
@@ -88,6 +110,8 @@ with col2:
     job_description = st.text_area("🧾 Paste Job Description", height=180)
     st.markdown('</div>', unsafe_allow_html=True)
 
+show_debug = st.checkbox("🛠 Include extracted skills (debug)")
+
 # =========================
 # Analyze Button
 # =========================
@@ -106,15 +130,34 @@ if st.button("🚀 Analyze CV"):
                 }
                 data = {"job_description": job_description}
 
+                # submit the job, then poll it instead of holding one long request open
                 response = requests.post(
-                    NGROK_URL,
+                    f"{NGROK_URL}/jobs",
                     files=files,
                     data=data,
-                    timeout=180
+                    params={"debug": "true"} if show_debug else None,
+                    timeout=60
                 )
 
-                if response.status_code == 200:
-                    report = response.json()
+                if response.status_code == 202:
+                    job_id = response.json()["job_id"]
+                    deadline = time.time() + MAX_WAIT
+                    while time.time() < deadline:
+                        time.sleep(POLL_INTERVAL)
+                        response = requests.get(f"{NGROK_URL}/jobs/{job_id}", timeout=30)
+                        if response.status_code != 200 or response.json().get("status") in ("done", "failed"):
+                            break
+
+                job = response.json() if response.status_code == 200 else {}
+
+                if response.status_code == 429:
+                    st.error("⏳ The server is busy, please try again in a moment.")
+
+                elif job.get("status") == "failed":
+                    st.error(f"❌ Analysis failed: {job.get('error')}")
+
+                elif job.get("status") == "done":
+                    report = job["result"]
 
                     # =========================
                     # Match Result
@@ -130,7 +173,8 @@ if st.button("🚀 Analyze CV"):
                     # =========================
                     # Matching Table
                     # =========================
-                    matching_table = report.get("matching_table", [])
+                    skills = report.get("skills", {})
+                    matching_table = matching_rows(skills)
                     st.markdown('<div class="card"><h2>📌 Skill Matching</h2>', unsafe_allow_html=True)
                     if matching_table:
                         st.dataframe(pd.DataFrame(matching_table), use_container_width=True)
@@ -141,7 +185,7 @@ if st.button("🚀 Analyze CV"):
                     # =========================
                     # Summary Table
                     # =========================
-                    summary_table = report.get("summary_table", [])
+                    summary_table = summary_rows(skills)
                     st.markdown('<div class="card"><h2>📋 Summary</h2>', unsafe_allow_html=True)
                     if summary_table:
                         st.dataframe(pd.DataFrame(summary_table), use_container_width=True)
@@ -162,10 +206,13 @@ if st.button("🚀 Analyze CV"):
                     # =========================
                     # Debug (اختياري)
                     # =========================
-                    with st.expander("🛠 Debug Info"):
-                        st.write("CV Skills:", report.get("__debug_cv_skills"))
-                        st.write("JD Skills:", report.get("__debug_jd_skills"))
-                        st.write("Raw Response:", response.text)
+                    if "debug" in report:
+                        with st.expander("🛠 Debug Info"):
+                            st.write("CV Skills:", report["debug"]["cv_skills"])
+                            st.write("JD Skills:", report["debug"]["jd_skills"])
+
+                elif response.status_code == 200:
+                    st.error("⌛ The analysis is taking too long, please try again later.")
 
                 else:
                     st.error(f"❌ Backend Error: {response.status_code}")
@@ -0,0 +1,113 @@
+"""Compare skill extraction of cheaper backends against the full model.
+
+    python -m benchmarks.backend_accuracy \
+        --candidate quantization=int8 \
+        --candidate device=cpu,dtype=bfloat16 \
+        --candidate model=mistralai/Mistral-7B-Instruct-v0.3,quantization=int4
+
+Each backend extracts skills from the fixture CVs and JDs; candidates are scored
+by F1 of their normalized skill sets against the reference. Candidates should be
+listed cheapest first: the first one at or above --min-f1 is reported as the pick.
+"""
+import argparse
+import gc
+import json
+import os
+import time
+
+from core import llm_engine
+from core.backends import TransformersBackend
+from models.chunked_extraction import extract_documents
+from models.cv_schema import build_cv_prompt, parse_cv_response
+from models.job_description_schema import build_jd_prompt, parse_jd_response
+from utils.text_utils import flatten_skills
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "extraction_fixtures.json")
+SPEC_KEYS = {"model", "device", "dtype", "quantization", "num_threads"}
+
+
+def parse_spec(spec):
+    options = dict(item.split("=", 1) for item in spec.split(",") if item)
+    unknown = set(options) - SPEC_KEYS
+    if unknown:
+        raise ValueError(f"unknown backend options: {sorted(unknown)}")
+    if "num_threads" in options:
+        options["num_threads"] = int(options["num_threads"])
+    return options
+
+def build_backend(options):
+    options = dict(options)
+    return TransformersBackend(options.pop("model", llm_engine.model_name), **options)
+
+def extract_fixtures(fixtures):
+    prompts = {"cv": (build_cv_prompt, parse_cv_response), "jd": (build_jd_prompt, parse_jd_response)}
+    results = {}
+    start = time.perf_counter()
+    for fixture in fixtures:
+        build_prompt, parse_response = prompts[fixture["kind"]]
+        try:
+            results[fixture["id"]] = flatten_skills(extract_documents([fixture["text"]], build_prompt, parse_response)[0])
+        except Exception:
+            # an unparseable answer counts as extracting nothing
+            results[fixture["id"]] = set()
+    seconds = time.perf_counter() - start
+    return results, seconds / max(len(fixtures), 1)
+
+def f1(predicted, expected):
+    if not predicted and not expected:
+        return 1.0
+    overlap = len(predicted & expected)
+    if overlap == 0:
+        return 0.0
+    precision, recall = overlap / len(predicted), overlap / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+def run_backend(options, fixtures):
+    backend = build_backend(options)
+    llm_engine.set_backend(backend)
+    try:
+        return backend.config, *extract_fixtures(fixtures)
+    finally:
+        llm_engine.set_backend(None)
+        del backend
+        gc.collect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reference", default="", help="backend options of the reference model (default: environment settings)")
+    parser.add_argument("--candidate", action="append", default=[], help="backend options, e.g. quantization=int8,dtype=bfloat16")
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--min-f1", type=float, default=0.9)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    with open(args.fixtures, encoding="utf-8") as f:
+        fixtures = json.load(f)
+
+    config, expected, seconds = run_backend(parse_spec(args.reference), fixtures)
+    report = {"reference": {"spec": args.reference, "config": config, "seconds_per_document": round(seconds, 3)}, "candidates": []}
+
+    for spec in args.candidate:
+        config, predicted, seconds = run_backend(parse_spec(spec), fixtures)
+        scores = {fixture_id: round(f1(predicted[fixture_id], expected[fixture_id]), 4) for fixture_id in expected}
+        mean_f1 = sum(scores.values()) / len(scores)
+        report["candidates"].append({
+            "spec": spec,
+            "config": config,
+            "mean_f1": round(mean_f1, 4),
+            "seconds_per_document": round(seconds, 3),
+            "per_fixture_f1": scores,
+        })
+        print(f"{spec or '(default)'}: F1 {mean_f1:.3f}, {seconds:.2f}s per document")
+
+    passing = [c for c in report["candidates"] if c["mean_f1"] >= args.min_f1]
+    report["pick"] = passing[0]["spec"] if passing else None
+    print("pick:", report["pick"] or "none reaches --min-f1, keep the reference")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
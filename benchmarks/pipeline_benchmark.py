@@ -0,0 +1,202 @@
+"""Per-stage timing of the /analyze pipeline on a synthetic corpus, with a fake LLM.
+
+    python -m benchmarks.pipeline_benchmark --iterations 20 --output bench.json
+
+Runs PDF parsing, skill extraction, normalization, matching and report building
+for CVs and JDs of several sizes and writes latency percentiles per stage, throughput and
+peak memory as JSON, so two runs can be diffed.
+"""
+import os
+
+# a deterministic fake model, no caching and no batching window: measure the pipeline itself
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ["LLM_BATCH_WAIT_MS"] = "0"
+
+import argparse
+import copy
+import json
+import platform
+import random
+import re
+import time
+import tracemalloc
+
+from core import llm_engine
+from core.backends import FakeBackend
+from core.skill_cache import SkillCache, set_skill_cache
+from models.cv_schema import extract_skills_for_cv_text
+from models.job_description_schema import extract_skills_for_jd
+from services.read_resume import read_resume
+from utils.text_utils import (build_matching_report, build_matching_table, flatten_skills,
+                              normalize_skill, normalize_skills_output, smart_split)
+
+SKILL_VOCABULARY = {
+    "programming_languages": ["Python", "Java", "JavaScript", "TypeScript", "Go", "C++", "SQL", "Rust", "Kotlin", "R"],
+    "frameworks_and_libraries": ["Django", "Flask", "FastAPI", "React", "Spring Boot", "PyTorch", "TensorFlow", "pandas", "NumPy", "Next.js"],
+    "tools_and_platforms": ["Docker", "Kubernetes", "AWS", "Azure", "GCP", "Git", "Jenkins", "Terraform", "PostgreSQL", "Redis"],
+    "domain_knowledge": ["FinTech", "E-commerce", "Healthcare", "Data Engineering", "Cyber Security", "Computer Vision"],
+    "technical_concepts": ["Microservices", "RESTful APIs", "CI/CD", "Machine Learning", "Data Structures", "System Design", "Unit Testing", "DevOps"],
+    "soft_skills": ["Communication", "Teamwork", "Problem Solving", "Leadership", "Time Management", "Attention to Detail"],
+}
+
+# (skills per document, CV pages)
+SIZES = {
+    "small": (8, 1),
+    "medium": (25, 3),
+    "large": (50, 12),
+}
+
+FILLER = "Delivered features end to end, worked with product owners and reviewed code of other team members."
+
+
+def fake_extraction(prompt):
+    """Return the vocabulary skills that appear in the document part of the prompt."""
+    document = re.split(r"CV TEXT:|JD Text:", prompt)[-1].lower()
+    found = {
+        # whole words only, "Go" and "R" would otherwise match inside any word
+        category: [skill for skill in skills if re.search(rf"(?<!\w){re.escape(skill.lower())}(?!\w)", document)]
+        for category, skills in SKILL_VOCABULARY.items()
+    }
+    return json.dumps({"skills": found})
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages):
+    """Minimal PDF with one Helvetica text stream per page; pages is a list of line lists."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        text = "BT /F1 10 Tf 50 750 Td 14 TL " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines) + " ET"
+        stream = text.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{k} 0 R" for k in kids).encode(), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def _pick_skills(rng, count):
+    pool = [skill for skills in SKILL_VOCABULARY.values() for skill in skills]
+    return rng.sample(pool, min(count, len(pool)))
+
+def make_document_pair(rng, skills_count, pages):
+    cv_skills = _pick_skills(rng, skills_count)
+    lines = [f"Candidate {rng.randint(1, 10_000)}", "Skills: " + ", ".join(cv_skills[:10])]
+    for skill in cv_skills[10:]:
+        lines.append(f"- Used {skill} in production projects.")
+    per_page = max(len(lines) // pages, 1) + 1
+    cv_pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)]
+    # pad with filler so every page has a realistic amount of text
+    cv_pages += [[] for _ in range(pages - len(cv_pages))]
+    cv_pages = [page + [FILLER] * (45 - len(page)) for page in cv_pages]
+
+    jd_skills = _pick_skills(rng, skills_count)
+    jd_text = "We are hiring.\n\nRequirements:\n" + "\n".join(f"- Experience with {skill}" for skill in jd_skills)
+    return make_pdf(cv_pages), jd_text
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def run_pipeline(cv_pdf, jd_text, timings):
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    cv_text = timed("read_resume", read_resume, cv_pdf)
+    cv_skills = timed("extract_cv", extract_skills_for_cv_text, cv_text)
+    jd_skills = timed("extract_jd", extract_skills_for_jd, jd_text)
+    timed("normalize", lambda: (
+        normalize_skills_output(copy.deepcopy(cv_skills)),
+        [normalize_skill(smart_split(skill)) for skill in flatten_skills(jd_skills)],
+    ))
+    matching = timed("build_matching_table", build_matching_table, jd_skills, cv_skills)
+    timed("build_matching_report", build_matching_report, matching)
+
+def peak_memory(cv_pdf, jd_text):
+    # a separate traced pass, tracemalloc slows everything down too much to time with it on
+    tracemalloc.start()
+    try:
+        run_pipeline(cv_pdf, jd_text, {})
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark(iterations, seed):
+    llm_engine.set_backend(FakeBackend(respond=fake_extraction))
+    set_skill_cache(SkillCache(max_entries=0))
+    rng = random.Random(seed)
+    results = {}
+
+    for size, (skills_count, pages) in SIZES.items():
+        corpus = [make_document_pair(rng, skills_count, pages) for _ in range(iterations)]
+        run_pipeline(*corpus[0], {})  # warm up imports and regex caches
+
+        timings = {}
+        start = time.perf_counter()
+        for cv_pdf, jd_text in corpus:
+            run_pipeline(cv_pdf, jd_text, timings)
+        elapsed = time.perf_counter() - start
+
+        results[size] = {
+            "skills_per_document": skills_count,
+            "cv_pages": pages,
+            "iterations": iterations,
+            "throughput_per_s": round(iterations / elapsed, 2),
+            "peak_memory_kb": round(peak_memory(*corpus[0]) / 1024, 1),
+            "stages": {
+                stage: {
+                    "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                    "p50_ms": round(percentile(values, 50) * 1000, 3),
+                    "p90_ms": round(percentile(values, 90) * 1000, 3),
+                    "p99_ms": round(percentile(values, 99) * 1000, 3),
+                }
+                for stage, values in timings.items()
+            },
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": benchmark(args.iterations, args.seed),
+    }
+    for size, result in report["sizes"].items():
+        stages = ", ".join(f"{stage} {s['p50_ms']}ms" for stage, s in result["stages"].items())
+        print(f"{size}: {result['throughput_per_s']} docs/s | p50 {stages}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
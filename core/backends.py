@@ -0,0 +1,481 @@
+import itertools
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import warnings
+from glob import glob
+from multiprocessing.connection import Client
+
+from core import metrics
+
+# batching limits for generate_batch
+MAX_BATCH_SIZE = 8
+MAX_BATCH_TOKENS = 16384
+
+# how TransformersBackend loads the model
+LLM_DEVICE = os.environ.get("LLM_DEVICE", "auto")              # auto, cpu, cuda
+LLM_DTYPE = os.environ.get("LLM_DTYPE", "auto")                # auto, float16, bfloat16, float32
+LLM_QUANTIZATION = os.environ.get("LLM_QUANTIZATION", "none")  # none, int8, int4
+LLM_NUM_THREADS = int(os.environ.get("LLM_NUM_THREADS", "0"))  # 0 keeps torch's default
+# CPU only: map the safetensors files instead of copying them, so every process
+# loading the same model shares the weight pages through the page cache
+LLM_MMAP_WEIGHTS = os.environ.get("LLM_MMAP_WEIGHTS", "0") == "1"
+
+# where RemoteBackend finds the inference worker(s): "host:port" or a unix socket path, comma separated
+LLM_WORKER_ADDRESS = os.environ.get("LLM_WORKER_ADDRESS", ".cache/llm_worker.sock")
+# the connection speaks pickle: TCP addresses need a real secret, only unix sockets
+# (protected by file permissions) may fall back to the built-in key
+LLM_WORKER_AUTHKEY = os.environ.get("LLM_WORKER_AUTHKEY", "")
+_UNIX_SOCKET_AUTHKEY = "resume-analyzer-llm"
+# seconds RemoteBackend waits for the worker to finish loading the model
+LLM_WORKER_WAIT = float(os.environ.get("LLM_WORKER_WAIT", "900"))
+
+
+def _plan_batches(lengths, max_new_tokens, max_batch_size, max_batch_tokens):
+    # sort by prompt length so each batch pads to a similar size
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches, current, longest = [], [], 0
+
+    for i in order:
+        new_longest = max(longest, lengths[i])
+        cost = (len(current) + 1) * (new_longest + max_new_tokens)
+        if current and (len(current) >= max_batch_size or cost > max_batch_tokens):
+            batches.append(current)
+            current, new_longest = [], lengths[i]
+        current.append(i)
+        longest = new_longest
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+class LLMBackend:
+    """Interface every generation backend implements.
+
+    Both methods return the decoded text of prompt + completion, like
+    ``model.generate`` followed by ``tokenizer.decode``. With ``structured=True``
+    decoding is greedy, stops once the JSON skills object is closed, and only the
+    completion is returned; a tuple of key names instead of True expects one
+    skills object per key.
+    """
+
+    name = "base"
+
+    def generate_text(self, prompt, max_new_tokens=150, num_return_sequences=1, structured=False):
+        raise NotImplementedError
+
+    def generate_batch(self, prompts, max_new_tokens=150, max_batch_size=MAX_BATCH_SIZE, max_batch_tokens=MAX_BATCH_TOKENS, structured=False):
+        return [self.generate_text(prompt, max_new_tokens, structured=structured)[0] for prompt in prompts]
+
+    def register_prefix(self, prefix):
+        """Hint that many prompts start with ``prefix``; backends may cache its encoding."""
+
+    def count_tokens(self, text):
+        # rough estimate for backends without a tokenizer
+        return len(text) // 4 + 1
+
+
+_SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+def _mmap_safetensors(path, torch):
+    # safetensors layout: 8-byte header size, JSON header, then the raw tensor data
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        # copy-on-write: pages stay shared with other processes as long as nobody writes them
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        if end == start:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            tensor = torch.frombuffer(buffer, dtype=dtype, offset=8 + header_size + start, count=(end - start) // dtype.itemsize)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+def _load_mmap_model(model_name, dtype):
+    from accelerate import init_empty_weights
+    from huggingface_hub import snapshot_download
+    from transformers import AutoConfig, AutoModelForCausalLM
+    import torch
+
+    folder = model_name if os.path.isdir(model_name) else snapshot_download(model_name, allow_patterns=["*.json", "*.safetensors"])
+    files = sorted(glob(os.path.join(folder, "*.safetensors")))
+    if not files:
+        raise ValueError(f"{model_name} has no safetensors weights to map")
+
+    state_dict = {}
+    for file in files:
+        state_dict.update(_mmap_safetensors(file, torch))
+    stored = {str(tensor.dtype).replace("torch.", "") for tensor in state_dict.values() if tensor.is_floating_point()}
+    if stored != {dtype}:
+        # converting would copy every tensor and lose the sharing
+        raise ValueError(f"LLM_MMAP_WEIGHTS needs LLM_DTYPE to match the checkpoint ({', '.join(sorted(stored))}), got {dtype}")
+
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(folder), torch_dtype=getattr(torch, dtype))
+    # assign=True keeps the mapped tensors as the parameters instead of copying into new ones
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"checkpoint of {model_name} is missing {len(missing)} parameters, e.g. {missing[0]}")
+    model.eval()
+    return model
+
+def resolve_model_config(device=LLM_DEVICE, dtype=LLM_DTYPE, quantization=LLM_QUANTIZATION):
+    """The device, dtype and quantization TransformersBackend actually loads, without loading anything."""
+    if device == "auto":
+        import torch
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    if dtype == "auto":
+        # fp16 matmuls are slow or missing on most CPUs, bf16 is not
+        dtype = "float16" if device == "cuda" else "bfloat16"
+    if device != "cuda" and quantization == "int8":
+        # dynamic quantization on CPU starts from float32 weights
+        dtype = "float32"
+    return {"device": device, "dtype": dtype, "quantization": quantization}
+
+def _load_model(model_name, device, dtype, quantization):
+    from transformers import AutoModelForCausalLM
+    import torch
+
+    if quantization not in ("none", "int8", "int4"):
+        raise ValueError(f"unknown quantization: {quantization}")
+    if LLM_MMAP_WEIGHTS and device == "cpu" and quantization == "none":
+        return _load_mmap_model(model_name, dtype)
+    kwargs = {"torch_dtype": getattr(torch, dtype), "low_cpu_mem_usage": True}
+    if device == "cuda":
+        kwargs["device_map"] = "auto"
+        if quantization in ("int8", "int4"):
+            from transformers import BitsAndBytesConfig
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_8bit=quantization == "int8",
+                load_in_4bit=quantization == "int4",
+                bnb_4bit_compute_dtype=getattr(torch, dtype),
+            )
+    elif quantization == "int4":
+        raise ValueError("int4 quantization needs a CUDA device")
+    elif quantization == "int8":
+        # bitsandbytes needs a GPU; on CPU the Linear layers are quantized dynamically,
+        # which works from float32 weights
+        kwargs["torch_dtype"] = torch.float32
+
+    model = AutoModelForCausalLM.from_pretrained(model_name, **kwargs)
+    if device == "cpu" and quantization == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    return model
+
+
+class TransformersBackend(LLMBackend):
+    """HuggingFace causal LM, the production backend."""
+
+    name = "transformers"
+
+    def __init__(self, model_name, device=LLM_DEVICE, dtype=LLM_DTYPE, quantization=LLM_QUANTIZATION, num_threads=LLM_NUM_THREADS):
+        from transformers import AutoTokenizer
+        import torch
+
+        self.torch = torch
+        self.model_name = model_name
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        self.config = {**resolve_model_config(device, dtype, quantization), "num_threads": torch.get_num_threads()}
+        device, dtype = self.config["device"], self.config["dtype"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = _load_model(model_name, device, dtype, quantization)
+        self._prefixes = {}
+        self._prefix_lock = threading.Lock()
+
+    def _generate_kwargs(self, prompt_length, structured):
+        if not structured:
+            return {"do_sample": True, "top_k": 50, "top_p": 0.95, "temperature": 0.7}
+
+        from transformers import LogitsProcessorList, StoppingCriteriaList
+        from core.structured_decoding import JsonObjectStoppingCriteria, SkillsJsonLogitsProcessor
+
+        kwargs = {
+            "do_sample": False,
+            "stopping_criteria": StoppingCriteriaList([JsonObjectStoppingCriteria(self.tokenizer, prompt_length)]),
+        }
+        sections = structured if isinstance(structured, tuple) else ("skills",)
+        try:
+            kwargs["logits_processor"] = LogitsProcessorList([SkillsJsonLogitsProcessor(self.tokenizer, prompt_length, sections)])
+        except ValueError:
+            # tokenizer can't express the grammar, early stopping still applies
+            pass
+        return kwargs
+
+    def count_tokens(self, text):
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def register_prefix(self, prefix):
+        # KV values are computed on first use, see _prefix_cache
+        self._prefixes.setdefault(prefix, None)
+
+    def _prefix_cache(self, prefix):
+        with self._prefix_lock:
+            if self._prefixes.get(prefix) is None:
+                ids = self.tokenizer(prefix)["input_ids"]
+                with self.torch.no_grad():
+                    out = self.model(input_ids=self.torch.tensor([ids], device=self.model.device), use_cache=True)
+                past = out.past_key_values
+                if hasattr(past, "to_legacy_cache"):
+                    past = past.to_legacy_cache()
+                self._prefixes[prefix] = (ids, past)
+            return self._prefixes[prefix]
+
+    def _encode(self, prompt):
+        # (prefix or None, token ids after the prefix)
+        for prefix in sorted(self._prefixes, key=len, reverse=True):
+            if prompt.startswith(prefix):
+                return prefix, self.tokenizer(prompt[len(prefix):], add_special_tokens=False)["input_ids"]
+        return None, self.tokenizer(prompt)["input_ids"]
+
+    def _run(self, prefix, suffixes, max_new_tokens, structured):
+        torch, tokenizer, model = self.torch, self.tokenizer, self.model
+        prefix_ids, past = self._prefix_cache(prefix) if prefix is not None else ([], None)
+
+        # pad between the shared prefix and each suffix so the prefix cache
+        # lines up for every row; without a prefix this is plain left padding
+        width = max(len(ids) for ids in suffixes)
+        input_ids = [prefix_ids + [tokenizer.pad_token_id] * (width - len(ids)) + ids for ids in suffixes]
+        attention_mask = [[1] * len(prefix_ids) + [0] * (width - len(ids)) + [1] * len(ids) for ids in suffixes]
+        input_ids = torch.tensor(input_ids, device=model.device)
+        attention_mask = torch.tensor(attention_mask, device=model.device)
+        prompt_length = input_ids.shape[1]
+
+        kwargs = self._generate_kwargs(prompt_length, structured)
+        if past is not None:
+            batch = len(suffixes)
+            kwargs["past_key_values"] = tuple(
+                tuple(t.expand(batch, *t.shape[1:]) for t in layer) for layer in past
+            )
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=tokenizer.pad_token_id,
+                **kwargs,
+            )
+        if metrics.METRICS_ENABLED:
+            generated = int((outputs[:, prompt_length:] != tokenizer.pad_token_id).sum())
+            metrics.record_generation(int(attention_mask.sum()), generated, time.perf_counter() - start)
+        return [
+            tokenizer.decode(output[prompt_length:] if structured else output, skip_special_tokens=True)
+            for output in outputs
+        ]
+
+    def generate_text(self, prompt, max_new_tokens=150, num_return_sequences=1, structured=False):
+        if structured or num_return_sequences == 1:
+            # greedy decoding gives the same answer every time
+            return self.generate_batch([prompt], max_new_tokens, structured=structured) * num_return_sequences
+
+        tokenizer, model = self.tokenizer, self.model
+        inputs = tokenizer(prompt, return_tensors="pt")
+        inputs = {k: v.to(model.device) for k, v in inputs.items()}
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            num_return_sequences=num_return_sequences,
+            **self._generate_kwargs(inputs["input_ids"].shape[1], structured),
+        )
+        return [tokenizer.decode(output, skip_special_tokens=True) for output in outputs]
+
+    def generate_batch(self, prompts, max_new_tokens=150, max_batch_size=MAX_BATCH_SIZE, max_batch_tokens=MAX_BATCH_TOKENS, structured=False):
+        if not prompts:
+            return []
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        groups = {}
+        with metrics.timed("tokenize"):
+            for i, prompt in enumerate(prompts):
+                prefix, ids = self._encode(prompt)
+                groups.setdefault(prefix, []).append((i, ids))
+
+        results = [None] * len(prompts)
+        for prefix, items in groups.items():
+            prefix_length = len(self._prefix_cache(prefix)[0]) if prefix is not None else 0
+            lengths = [prefix_length + len(ids) for _, ids in items]
+            for batch in _plan_batches(lengths, max_new_tokens, max_batch_size, max_batch_tokens):
+                texts = self._run(prefix, [items[j][1] for j in batch], max_new_tokens, structured)
+                for j, text in zip(batch, texts):
+                    results[items[j][0]] = text
+
+        return results
+
+
+EMPTY_SKILLS = {
+    "skills": {
+        "programming_languages": [],
+        "frameworks_and_libraries": [],
+        "tools_and_platforms": [],
+        "domain_knowledge": [],
+        "technical_concepts": [],
+        "soft_skills": []
+    }
+}
+
+class FakeBackend(LLMBackend):
+    """Deterministic stand-in for tests and benchmarks, loads nothing.
+
+    ``respond`` maps a prompt to the JSON completion; by default every prompt
+    gets an empty skills object. Outside structured mode the JSON is wrapped in
+    a ```json fence and appended to the prompt, like the sampling model does.
+    """
+
+    name = "fake"
+
+    def __init__(self, model_name="fake", respond=None):
+        self.model_name = model_name
+        self.respond = respond or (lambda prompt: json.dumps(EMPTY_SKILLS))
+
+    def generate_text(self, prompt, max_new_tokens=150, num_return_sequences=1, structured=False):
+        completion = self.respond(prompt)
+        if not structured:
+            completion = prompt + "```json\n" + completion + "\n```"
+        return [completion] * num_return_sequences
+
+
+def worker_address(address):
+    # "host:port" is TCP, anything else a unix socket path
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+def worker_authkey(address, authkey=LLM_WORKER_AUTHKEY):
+    """Key for a parsed worker address; refuses to run TCP without LLM_WORKER_AUTHKEY."""
+    if authkey and authkey != _UNIX_SOCKET_AUTHKEY:
+        return authkey.encode("utf-8")
+    if isinstance(address, tuple):
+        raise ValueError(f"inference worker at {address[0]}:{address[1]} is reachable over TCP, set LLM_WORKER_AUTHKEY to a secret")
+    return _UNIX_SOCKET_AUTHKEY.encode("utf-8")
+
+
+class RemoteBackend(LLMBackend):
+    """Sends generation to inference worker processes (``core.inference_worker``) that own the model.
+
+    API processes using this backend load no weights. Each thread keeps its own
+    connection to one worker, so concurrent requests from every API process meet
+    in the worker's batch scheduler.
+    """
+
+    name = "remote"
+
+    def __init__(self, model_name, address=LLM_WORKER_ADDRESS, authkey=LLM_WORKER_AUTHKEY, wait=LLM_WORKER_WAIT):
+        self.model_name = model_name
+        self.addresses = [worker_address(part.strip()) for part in address.split(",") if part.strip()]
+        self.authkeys = {address: worker_authkey(address, authkey) for address in self.addresses}
+        self._local = threading.local()
+        self._turn = itertools.count()
+        self.config = {"workers": [self._wait_ready(address, wait) for address in self.addresses]}
+
+    def _wait_ready(self, address, wait):
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                with Client(address, authkey=self.authkeys[address]) as conn:
+                    status = self._request(conn, "status")
+                if status["state"] == "ready":
+                    break
+                if status["state"] == "failed":
+                    raise RuntimeError(f"inference worker at {address} failed to load: {status['error']}")
+            except (OSError, EOFError):
+                # not listening yet
+                status = None
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"inference worker at {address} not ready after {wait:.0f}s")
+            time.sleep(1)
+
+        # cache keys include the model name, both sides have to agree on it
+        if status["model_name"] != self.model_name:
+            raise ValueError(f"inference worker at {address} serves {status['model_name']}, not {self.model_name}")
+        return {"address": str(address), "backend": status["backend"], **(status["config"] or {})}
+
+    def _exchange(self, conn, method, args, kwargs):
+        # transport only, OSError/EOFError here means the connection broke
+        conn.send((method, args, kwargs))
+        return conn.recv()
+
+    def _reply(self, outcome, value):
+        if outcome == "error":
+            raise value
+        return value
+
+    def _request(self, conn, method, *args, **kwargs):
+        return self._reply(*self._exchange(conn, method, args, kwargs))
+
+    def _connection(self, address):
+        connections = self._local.__dict__.setdefault("connections", {})
+        if address not in connections:
+            connections[address] = Client(address, authkey=self.authkeys[address])
+        return connections[address]
+
+    def _call(self, method, *args, address=None, **kwargs):
+        if address is None:
+            # a thread sticks to one worker, threads are spread over all of them
+            if not hasattr(self._local, "address"):
+                self._local.address = self.addresses[next(self._turn) % len(self.addresses)]
+            address = self._local.address
+        try:
+            reply = self._exchange(self._connection(address), method, args, kwargs)
+        except (OSError, EOFError):
+            # the worker restarted: reconnect once, generation is safe to repeat.
+            # An error the worker itself raised comes back as a reply below and is not retried
+            broken = self._local.connections.pop(address, None)
+            if broken is not None:
+                broken.close()
+            reply = self._exchange(self._connection(address), method, args, kwargs)
+        return self._reply(*reply)
+
+    def generate_text(self, prompt, max_new_tokens=150, num_return_sequences=1, structured=False):
+        return self._call("generate_text", prompt, max_new_tokens=max_new_tokens, num_return_sequences=num_return_sequences, structured=structured)
+
+    def generate_batch(self, prompts, max_new_tokens=150, max_batch_size=MAX_BATCH_SIZE, max_batch_tokens=MAX_BATCH_TOKENS, structured=False):
+        return self._call(
+            "generate_batch",
+            prompts,
+            max_new_tokens=max_new_tokens,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+            structured=structured,
+        )
+
+    def register_prefix(self, prefix):
+        for address in self.addresses:
+            self._call("register_prompt_prefix", prefix, address=address)
+
+    def count_tokens(self, text):
+        return self._call("count_tokens", text)
+
+
+BACKENDS = {
+    "transformers": TransformersBackend,
+    "fake": FakeBackend,
+    "remote": RemoteBackend,
+}
+
+def register_backend(name, factory):
+    """Make a backend selectable through LLM_BACKEND; factory is called with the model name."""
+    BACKENDS[name] = factory
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    """Collects prompts that arrive close together and generates them as one batch.
+
+    Callers get a Future; a background thread waits up to ``max_wait_ms`` after
+    the first prompt for more to arrive, then hands the group to ``run_batch``
+    (``generate_batch``-compatible) and resolves each Future with its own text.
+    """
+
+    def __init__(self, run_batch, max_wait_ms=10, max_batch_size=8, max_batch_tokens=16384):
+        self.run_batch = run_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "max_batch_size": 0, "queue_wait_total": 0.0, "queue_wait_max": 0.0}
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, prompt, max_new_tokens=150, structured=False):
+        future = Future()
+        self._queue.put((prompt, max_new_tokens, structured, future, time.perf_counter()))
+        return future
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        batches, requests = stats["batches"], stats["requests"]
+        return {
+            "requests": requests,
+            "batches": batches,
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "max_batch_size": stats["max_batch_size"],
+            "avg_queue_wait_ms": round(stats["queue_wait_total"] / requests * 1000, 2) if requests else 0.0,
+            "max_queue_wait_ms": round(stats["queue_wait_max"] * 1000, 2),
+        }
+
+    @staticmethod
+    def _estimate_tokens(item):
+        # rough count, the backend re-plans with the real tokenizer
+        prompt, max_new_tokens = item[0], item[1]
+        return len(prompt) // 4 + max_new_tokens
+
+    def _collect(self, items):
+        # fills the loop's list, so items already taken off the queue are failed, not lost, on an error
+        items.append(self._queue.get())
+        tokens = self._estimate_tokens(items[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(items) < self.max_batch_size and tokens < self.max_batch_tokens:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            tokens += self._estimate_tokens(item)
+
+    def _loop(self):
+        while True:
+            items = []
+            try:
+                self._collect(items)
+                self._run(items)
+            except Exception as e:
+                # this thread serves every caller, an error must not end it
+                for item in items:
+                    if not item[3].done():
+                        item[3].set_exception(e)
+
+    def _run(self, items):
+        # generate_batch takes one setting per call, split by it
+        groups = {}
+        for item in items:
+            groups.setdefault((item[1], item[2]), []).append(item)
+
+        for (max_new_tokens, structured), group in groups.items():
+            self._record(group)
+            try:
+                texts = self.run_batch(
+                    [item[0] for item in group],
+                    max_new_tokens=max_new_tokens,
+                    max_batch_size=self.max_batch_size,
+                    max_batch_tokens=self.max_batch_tokens,
+                    structured=structured,
+                )
+                if len(texts) != len(group):
+                    raise RuntimeError(f"run_batch returned {len(texts)} texts for {len(group)} prompts")
+            except Exception as e:
+                for item in group:
+                    item[3].set_exception(e)
+                continue
+            for item, text in zip(group, texts):
+                item[3].set_result(text)
+
+    def _record(self, group):
+        now = time.perf_counter()
+        waits = [now - item[4] for item in group]
+        with self._lock:
+            self._stats["requests"] += len(group)
+            self._stats["batches"] += 1
+            self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(group))
+            self._stats["queue_wait_total"] += sum(waits)
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], max(waits))
@@ -0,0 +1,119 @@
+"""Inference worker: one process that owns the model and serves generation to API processes.
+
+    python -m core.inference_worker --address .cache/llm_worker.sock
+
+API processes started with LLM_BACKEND=remote connect to it instead of loading
+the model themselves, so adding API workers does not add model copies. Every
+connection is served by its own thread and single prompts go through this
+process's batch scheduler, so requests of different API processes are batched
+together.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+from multiprocessing.connection import Listener
+
+from core import llm_engine
+from core.backends import LLM_WORKER_ADDRESS, LLM_WORKER_AUTHKEY, worker_address, worker_authkey
+
+# what a RemoteBackend may call
+METHODS = {
+    "status": llm_engine.load_status,
+    "register_prompt_prefix": llm_engine.register_prompt_prefix,
+    "count_tokens": llm_engine.count_tokens,
+    "generate_text": llm_engine.generate_text,
+    "generate_batch": llm_engine.generate_batch,
+}
+
+
+def _warmup():
+    try:
+        llm_engine.warmup()
+    except Exception:
+        # the error is in load_status, RemoteBackend reports it
+        pass
+
+def _serve_connection(conn):
+    with conn:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                reply = ("ok", METHODS[method](*args, **kwargs))
+            except Exception as e:
+                reply = ("error", e)
+            try:
+                conn.send(reply)
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                # the reply does not pickle: send the method's own exception as
+                # text, or the pickling error for a result that does not pickle
+                outcome, value = reply
+                conn.send(("error", RuntimeError(repr(value if outcome == "error" else e))))
+
+def serve(address=LLM_WORKER_ADDRESS, authkey=LLM_WORKER_AUTHKEY):
+    if llm_engine.backend_name == "remote":
+        raise SystemExit("the inference worker needs a local backend, LLM_BACKEND=remote would call itself")
+    address = worker_address(address)
+    authkey = worker_authkey(address, authkey)
+    if isinstance(address, str):
+        folder = os.path.dirname(address)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if os.path.exists(address):
+            # left behind by a worker that did not shut down cleanly
+            os.remove(address)
+
+    listener = Listener(address, authkey=authkey)
+    if isinstance(address, str):
+        # only this user may connect to the socket
+        os.chmod(address, 0o600)
+    # load in the background so status requests are answered while loading
+    threading.Thread(target=_warmup, daemon=True).start()
+    print(f"inference worker listening on {address}", flush=True)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, multiprocessing.AuthenticationError):
+                continue
+            threading.Thread(target=_serve_connection, args=(conn,), daemon=True).start()
+    finally:
+        listener.close()
+
+def start_inference_workers(address=LLM_WORKER_ADDRESS, authkey=LLM_WORKER_AUTHKEY):
+    """Start one worker process per address in the comma-separated list."""
+    # spawn: a fresh interpreter, nothing of the parent's state is copied into the model process
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for part in address.split(","):
+        if part.strip():
+            # not a daemon: the caller keeps it running and stops it, see stop_inference_workers
+            process = context.Process(target=serve, args=(part.strip(), authkey))
+            process.start()
+            processes.append(process)
+    return processes
+
+def stop_inference_workers(processes, timeout=10):
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=LLM_WORKER_ADDRESS, help='unix socket path or "host:port"')
+    args = parser.parse_args()
+    serve(args.address)
+
+
+if __name__ == "__main__":
+    main()
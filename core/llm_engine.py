@@ -1,23 +1,152 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
+import os
+import threading
 
-model_name = "mistralai/Mistral-Nemo-Instruct-2407"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float16, device_map="auto")
+from core.backends import BACKENDS, MAX_BATCH_SIZE, MAX_BATCH_TOKENS, resolve_model_config
+from core.batch_scheduler import BatchScheduler
+from core.metrics import timed
 
-def generate_text(prompt, max_new_tokens=150, num_return_sequences=1):
+model_name = os.environ.get("LLM_MODEL_NAME", "mistralai/Mistral-Nemo-Instruct-2407")
+backend_name = os.environ.get("LLM_BACKEND", "transformers")
+# greedy, JSON-constrained decoding for skill extraction (set to 0 to sample freely)
+STRUCTURED_OUTPUT = os.environ.get("LLM_STRUCTURED_OUTPUT", "1") == "1"
+# concurrent generate_text calls within this window share one batch (0 turns it off)
+BATCH_WAIT_MS = float(os.environ.get("LLM_BATCH_WAIT_MS", "10"))
+BATCH_MAX_SIZE = int(os.environ.get("LLM_BATCH_MAX_SIZE", str(MAX_BATCH_SIZE)))
+BATCH_MAX_TOKENS = int(os.environ.get("LLM_BATCH_MAX_TOKENS", str(MAX_BATCH_TOKENS)))
 
-    inputs = tokenizer(prompt, return_tensors="pt")
-    inputs = {k: v.to(model.device) for k, v in inputs.items()}
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=max_new_tokens,
-        num_return_sequences=num_return_sequences,
-        do_sample=True,
-        top_k=50,
-        top_p=0.95,
-        temperature=0.7,
-    )
+# the model is loaded on first use (or by warmup) and shared by the whole process
+_backend = None
+_load_state = "not_loaded"
+_load_error = None
+_load_lock = threading.Lock()
+_scheduler = None
+_prompt_prefixes = []
 
-    return [tokenizer.decode(output, skip_special_tokens=True) for output in outputs]
 
+def get_backend():
+    global _backend, _load_state, _load_error
+    if _backend is not None:
+        return _backend
+
+    with _load_lock:
+        if _backend is None:
+            _load_state = "loading"
+            try:
+                backend = BACKENDS[backend_name](model_name)
+                for prefix in _prompt_prefixes:
+                    backend.register_prefix(prefix)
+                _backend = backend
+            except Exception as e:
+                _load_state = "failed"
+                _load_error = repr(e)
+                raise
+            _load_state = "ready"
+            _load_error = None
+    return _backend
+
+def set_backend(backend):
+    """Swap in an already-built backend (e.g. FakeBackend in tests and benchmarks)."""
+    global _backend, _load_state, _load_error, _model_variant
+    with _load_lock:
+        if backend is not None:
+            for prefix in _prompt_prefixes:
+                backend.register_prefix(prefix)
+        _backend = backend
+        _load_state = "ready" if backend is not None else "not_loaded"
+        _load_error = None
+        _model_variant = None
+
+def register_prompt_prefix(prefix):
+    """Declare a constant prompt preamble so the backend can reuse its KV cache."""
+    with _load_lock:
+        # an inference worker hears the same prefixes from every API process
+        if prefix in _prompt_prefixes:
+            return
+        _prompt_prefixes.append(prefix)
+        if _backend is not None:
+            _backend.register_prefix(prefix)
+
+def warmup():
+    """Load the model now instead of on the first request."""
+    get_backend()
+
+def get_scheduler():
+    global _scheduler
+    # with the remote backend the batching happens in the worker, where requests of all API processes meet
+    if BATCH_WAIT_MS <= 0 or backend_name == "remote":
+        return None
+    with _load_lock:
+        if _scheduler is None:
+            _scheduler = BatchScheduler(
+                lambda prompts, **kwargs: get_backend().generate_batch(prompts, **kwargs),
+                max_wait_ms=BATCH_WAIT_MS,
+                max_batch_size=BATCH_MAX_SIZE,
+                max_batch_tokens=BATCH_MAX_TOKENS,
+            )
+    return _scheduler
+
+def scheduler_metrics():
+    return _scheduler.metrics() if _scheduler is not None else None
+
+def load_status():
+    return {
+        "model_name": model_name,
+        "backend": backend_name if _backend is None else _backend.name,
+        "state": _load_state,
+        "error": _load_error,
+        "config": getattr(_backend, "config", None),
+        "batching": scheduler_metrics(),
+    }
+
+def decoding_mode():
+    return "structured" if STRUCTURED_OUTPUT else "sampled"
+
+_model_variant = None
+
+def _variant_config(backend):
+    config = getattr(backend, "config", None) or {}
+    # a remote backend answers with the worker's model
+    return config["workers"][0] if "workers" in config else config
+
+def model_variant():
+    """dtype and quantization of the model answering, part of the skill cache keys."""
+    global _model_variant
+    if _model_variant is None:
+        if _backend is None and backend_name == "transformers":
+            # known from the settings, no need to load the model for a cache lookup
+            config = resolve_model_config()
+        else:
+            config = _variant_config(get_backend())
+        _model_variant = f"{config.get('dtype', backend_name)}-{config.get('quantization', 'none')}"
+    return _model_variant
+
+def is_ready():
+    return _load_state == "ready"
+
+def count_tokens(text):
+    return get_backend().count_tokens(text)
+
+def generate_text(prompt, max_new_tokens=150, num_return_sequences=1, structured=False):
+    scheduler = get_scheduler() if num_return_sequences == 1 else None
+    with timed("generate"):
+        if scheduler is not None:
+            return [scheduler.submit(prompt, max_new_tokens=max_new_tokens, structured=structured).result()]
+        return get_backend().generate_text(
+            prompt,
+            max_new_tokens=max_new_tokens,
+            num_return_sequences=num_return_sequences,
+            structured=structured,
+        )
+
+def generate_batch(prompts, max_new_tokens=150, max_batch_size=BATCH_MAX_SIZE, max_batch_tokens=BATCH_MAX_TOKENS, structured=False):
+    """Generate one completion per prompt, running prompts through the model in left-padded batches."""
+    if not prompts:
+        return []
+    with timed("generate"):
+        return get_backend().generate_batch(
+            prompts,
+            max_new_tokens=max_new_tokens,
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+            structured=structured,
+        )
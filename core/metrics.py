@@ -0,0 +1,141 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# stage histograms and token counters behind /metrics
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "0") == "1"
+# Server-Timing header with the stage durations of each request
+TIMING_HEADERS = os.environ.get("METRICS_TIMING_HEADERS", "0") == "1"
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+_stages = {}
+_counters = {"llm_prompt_tokens_total": 0, "llm_generated_tokens_total": 0, "llm_generation_seconds_total": 0.0}
+_last_tokens_per_second = 0.0
+# "cached" / "combined" / "separate" -> count, from extract_skills_combined
+_extraction_paths = {}
+# stage -> seconds for the request being served, None outside a request
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_TIMER = _NoTimer()
+
+
+def record(stage, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+    if METRICS_ENABLED:
+        with _lock:
+            histogram = _stages.get(stage)
+            if histogram is None:
+                histogram = _stages[stage] = _Histogram()
+            histogram.observe(seconds)
+
+def timed(stage):
+    """``with timed("read_resume"):`` -- a shared no-op when nothing is collecting."""
+    if not METRICS_ENABLED and _request_timings.get() is None:
+        return _NO_TIMER
+    return _Timer(stage)
+
+def record_generation(prompt_tokens, generated_tokens, seconds):
+    global _last_tokens_per_second
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters["llm_prompt_tokens_total"] += prompt_tokens
+        _counters["llm_generated_tokens_total"] += generated_tokens
+        _counters["llm_generation_seconds_total"] += seconds
+        if seconds > 0:
+            _last_tokens_per_second = generated_tokens / seconds
+
+def record_extraction_path(path):
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _extraction_paths[path] = _extraction_paths.get(path, 0) + 1
+
+@contextmanager
+def request_timings():
+    """Collect the stage durations of the current request (also across run_blocking threads)."""
+    token = _request_timings.set({})
+    try:
+        yield _request_timings.get()
+    finally:
+        _request_timings.reset(token)
+
+def server_timing_header(timings):
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+def render_prometheus():
+    """The collected metrics in the Prometheus text exposition format."""
+    with _lock:
+        stages = {stage: (list(h.counts), h.total, h.count) for stage, h in _stages.items()}
+        counters = dict(_counters)
+        tokens_per_second = _last_tokens_per_second
+        extraction_paths = dict(_extraction_paths)
+
+    lines = [
+        "# HELP ats_stage_seconds Time spent in each analysis stage.",
+        "# TYPE ats_stage_seconds histogram",
+    ]
+    for stage, (counts, total, count) in sorted(stages.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'ats_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'ats_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'ats_stage_seconds_sum{{stage="{stage}"}} {total}')
+        lines.append(f'ats_stage_seconds_count{{stage="{stage}"}} {count}')
+
+    for name, value in counters.items():
+        lines.append(f"# TYPE ats_{name} counter")
+        lines.append(f"ats_{name} {value}")
+    lines.append("# HELP ats_llm_tokens_per_second Generated tokens per second of the last batch.")
+    lines.append("# TYPE ats_llm_tokens_per_second gauge")
+    lines.append(f"ats_llm_tokens_per_second {tokens_per_second}")
+    lines.append("# HELP ats_extraction_path_total Analyses by extraction path (cached, combined or separate).")
+    lines.append("# TYPE ats_extraction_path_total counter")
+    for path, count in sorted(extraction_paths.items()):
+        lines.append(f'ats_extraction_path_total{{path="{path}"}} {count}')
+    return "\n".join(lines) + "\n"
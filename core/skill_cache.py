@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.environ.get("SKILL_CACHE_PATH", ".cache/skills.sqlite3")
+CACHE_MAX_ENTRIES = int(os.environ.get("SKILL_CACHE_MAX_ENTRIES", "10000"))
+
+
+def make_key(model_name, kind, prompt_version, text):
+    """Content-addressed key: same model + prompt version + document text -> same key."""
+    raw = f"{model_name}\x00{kind}\x00{prompt_version}\x00{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SkillCache:
+    """Persistent SQLite cache of extracted skill dicts with LRU eviction."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS skills ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS skills_last_used ON skills(last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM skills WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE skills SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        # a fresh object every time, callers normalize the dict in place
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO skills (key, value, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        count = conn.execute("SELECT COUNT(*) FROM skills").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM skills WHERE key IN "
+                "(SELECT key FROM skills ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM skills")
+            conn.commit()
+
+
+_skill_cache = None
+
+def get_skill_cache():
+    global _skill_cache
+    if _skill_cache is None:
+        _skill_cache = SkillCache()
+    return _skill_cache
+
+def set_skill_cache(cache):
+    """Replace the shared cache, e.g. SkillCache(max_entries=0) to turn caching off."""
+    global _skill_cache
+    _skill_cache = cache
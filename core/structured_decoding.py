@@ -0,0 +1,122 @@
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+from utils.constants import SKILL_CATEGORIES
+
+
+class JsonObjectStoppingCriteria(StoppingCriteria):
+    """Stops generation once the first top-level JSON object in the completion closes."""
+
+    def __init__(self, tokenizer, prompt_length):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self._rows = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self._rows is None:
+            self._rows = [{"depth": 0, "in_string": False, "escape": False, "done": False} for _ in range(input_ids.shape[0])]
+        if input_ids.shape[1] > self.prompt_length:
+            for row, state in zip(input_ids, self._rows):
+                if not state["done"]:
+                    self._feed(state, self.tokenizer.decode(row[-1:], skip_special_tokens=True))
+
+        # one flag per row, finished rows are padded while the rest keep going
+        return torch.tensor([state["done"] for state in self._rows], dtype=torch.bool, device=input_ids.device)
+
+    @staticmethod
+    def _feed(state, text):
+        for ch in text:
+            if state["in_string"]:
+                if state["escape"]:
+                    state["escape"] = False
+                elif ch == "\\":
+                    state["escape"] = True
+                elif ch == '"':
+                    state["in_string"] = False
+            elif ch == '"' and state["depth"] > 0:
+                state["in_string"] = True
+            elif ch == "{":
+                state["depth"] += 1
+            elif ch == "}" and state["depth"] > 0:
+                state["depth"] -= 1
+                if state["depth"] == 0:
+                    state["done"] = True
+                    return
+
+
+class SkillsJsonLogitsProcessor(LogitsProcessor):
+    """Constrains the completion to {"skills": {<six categories>: [...]}}.
+
+    ``sections`` gives the top-level keys, each holding the six categories
+    (``("cv_skills", "jd_skills")`` for the combined prompt). The keys and
+    punctuation between the arrays are forced token by token; inside each array
+    the model is free, except that it cannot emit braces or a ``]`` glued to
+    other text, so the only way out of an array is the plain ``]`` token.
+    """
+
+    def __init__(self, tokenizer, prompt_length, sections=("skills",), categories=SKILL_CATEGORIES):
+        self.prompt_length = prompt_length
+        self.eos_token_id = tokenizer.eos_token_id
+        self.close_id, self.banned_ids = _array_token_ids(tokenizer)
+
+        # alternate forced literals and free arrays, then force EOS
+        self.plan = []
+        for s, section in enumerate(sections):
+            for c, category in enumerate(categories):
+                if c > 0:
+                    opening = ", "
+                else:
+                    opening = ("{" if s == 0 else "}, ") + f'"{section}": {{'
+                literal = f'{opening}"{category}": ['
+                self.plan.append(tokenizer.encode(literal, add_special_tokens=False))
+                self.plan.append(None)
+        self.plan.append(tokenizer.encode("}}", add_special_tokens=False))
+        self._rows = None
+
+    def __call__(self, input_ids, scores):
+        if self._rows is None:
+            self._rows = [[0, 0] for _ in range(input_ids.shape[0])]
+            self.banned_ids = self.banned_ids.to(scores.device)
+        started = input_ids.shape[1] > self.prompt_length
+
+        for b, state in enumerate(self._rows):
+            step, offset = state
+            if started and step < len(self.plan) and self.plan[step] is None and input_ids[b, -1].item() == self.close_id:
+                step, offset = step + 1, 0
+
+            if step >= len(self.plan):
+                self._force(scores, b, self.eos_token_id)
+            elif self.plan[step] is None:
+                scores[b, self.banned_ids] = -float("inf")
+            else:
+                self._force(scores, b, self.plan[step][offset])
+                offset += 1
+                if offset == len(self.plan[step]):
+                    step, offset = step + 1, 0
+            state[0], state[1] = step, offset
+
+        return scores
+
+    @staticmethod
+    def _force(scores, row, token_id):
+        keep = scores[row, token_id].clone()
+        scores[row, :] = -float("inf")
+        scores[row, token_id] = keep if torch.isfinite(keep) else 0.0
+
+
+_array_token_cache = {}
+
+def _array_token_ids(tokenizer):
+    # scanning the vocabulary is slow, do it once per tokenizer
+    key = id(tokenizer)
+    if key not in _array_token_cache:
+        close_ids = tokenizer.encode("]", add_special_tokens=False)
+        if len(close_ids) != 1:
+            raise ValueError("tokenizer has no single ']' token, constrained decoding is not supported")
+        close_id = close_ids[0]
+        banned = [
+            token_id for token_id in range(len(tokenizer))
+            if token_id != close_id and any(ch in tokenizer.decode([token_id]) for ch in "{}]")
+        ]
+        _array_token_cache[key] = (close_id, torch.tensor(banned, dtype=torch.long))
+    return _array_token_cache[key]
@@ -1,82 +1,284 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, Request
+from typing import List
+from fastapi.responses import PlainTextResponse
+from fastapi.middleware.gzip import GZipMiddleware
 import nest_asyncio
 import uvicorn
-import pandas as pd
-import numpy as np
-from models.cv_schema import extract_skills_for_cv
+import asyncio
+import contextvars
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from models.cv_schema import extract_skills_for_cv, extract_skills_for_cvs
 from models.job_description_schema import extract_skills_for_jd
-from core.llm_engine import generate_text
+from models.combined_schema import extract_skills_combined, COMBINED_EXTRACTION
+from core.llm_engine import generate_text, warmup, load_status, is_ready
+from core.inference_worker import start_inference_workers, stop_inference_workers
+from core.metrics import METRICS_ENABLED, TIMING_HEADERS, timed, request_timings, server_timing_header, render_prometheus
 from services.read_jobDescription import read_job_description
 from services.read_resume import read_resume
+from services.candidate_store import get_candidate_store, RANK_TOP_K
+from services.job_queue import get_job_queue, register_task, QueueFullError
 from utils.constants import KNOWN_SKILL_WORDS
 from utils.json_extractor import extract_json_block
-from utils.text_utils import (flatten_skills, skill_match_status, normalize_skill, normalize_skills_output, smart_split, ensure_skills_dict, build_matching_table, build_matching_report,calculate_score,matching_to_dataframe,prettify_matching_df,calculate_match_score,generate_recommendation,generate_summary_df)
+from utils.scoring import ScoringWeights
+from utils.semantic_matcher import get_semantic_matcher
+from utils.text_utils import (flatten_skills, skill_match_status, normalize_skill, normalize_skills_output, smart_split, ensure_skills_dict, build_matching_table, build_compact_report,calculate_score,matching_to_dataframe,prettify_matching_df,calculate_match_score,generate_recommendation,generate_summary_df)
+
+# orjson بيعمل serialize أسرع بكتير من json، ولو مش متسطب بنرجع للعادي
+try:
+    import orjson # type: ignore
+    from fastapi.responses import ORJSONResponse as JSONResponse
+except ImportError:
+    from fastapi.responses import JSONResponse
+
+# الردود الأكبر من كده بتتضغط (brotli لو brotli-asgi متسطب، غير كده gzip)
+COMPRESSION_MIN_SIZE = int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", "1000"))
 
 
 nest_asyncio.apply()
-app = FastAPI()
-
-
-def convert_numpy(obj):
-    """تحويل أنواع numpy لأنواع JSON-friendly"""
-    if isinstance(obj, dict):
-        return {k: convert_numpy(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy(i) for i in obj]
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return [convert_numpy(i) for i in obj]
-    else:
-        return obj
-
-def convert_report(report):
-    """تحويل الـ DataFrame و numpy objects لأي JSON-friendly structure"""
-    if isinstance(report, pd.DataFrame):
-        # تحويل الـ DataFrame لقائمة dicts
-        return [convert_numpy(row) for row in report.to_dict(orient="records")]
-    elif isinstance(report, list):
-        return [convert_report(item) for item in report]
-    elif isinstance(report, dict):
-        return {k: convert_report(v) for k, v in report.items()}
-    else:
-        return convert_numpy(report)
+app = FastAPI(default_response_class=JSONResponse)
+
+try:
+    from brotli_asgi import BrotliMiddleware # type: ignore
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# الشغل التقيل (PDF و الموديل) بيتعمل هنا عشان الـ event loop ما يقفش
+ANALYZE_WORKERS = int(os.environ.get("ANALYZE_WORKERS", "4"))
+executor = ThreadPoolExecutor(max_workers=ANALYZE_WORKERS)
+
+async def run_blocking(func, *args):
+    loop = asyncio.get_running_loop()
+    # الـ context بيتنقل للـ thread عشان توقيتات الـ request تتسجل
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, context.run, func, *args)
+
+
+# =======================
+# تحميل الموديل في الخلفية
+# =======================
+@app.on_event("startup")
+def start_warmup():
+    # السيرفر بيشتغل فوراً و /ready بتقول امتى الموديل جاهز
+    threading.Thread(target=warmup, daemon=True).start()
+    threading.Thread(target=get_candidate_store().load, daemon=True).start()
+
+@app.get("/ready")
+def ready():
+    status = load_status()
+    return JSONResponse(content=status, status_code=200 if is_ready() else 503)
+
+# =======================
+# metrics و توقيت كل مرحلة
+# =======================
+@app.middleware("http")
+async def add_timing_headers(request: Request, call_next):
+    if not TIMING_HEADERS:
+        return await call_next(request)
+    with request_timings() as timings:
+        start = time.perf_counter()
+        response = await call_next(request)
+        timings["total"] = time.perf_counter() - start
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+@app.get("/metrics")
+def metrics():
+    if not METRICS_ENABLED:
+        return JSONResponse(content={"detail": "metrics are disabled, set METRICS_ENABLED=1"}, status_code=404)
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 # =======================
 # الـ endpoint
 # =======================
+def build_report_json(cv_skills, jd_skills, weights=None):
+    with timed("matching"):
+        matching_results = build_matching_table(jd_skills, cv_skills, get_semantic_matcher())
+    with timed("report"):
+        # التقرير المختصر: الـ score والـ skills متقسمة حسب الحالة، والـ labels بتتعمل عند الـ client
+        return build_compact_report(matching_results, weights)
+
+def add_debug_info(report_json, cv_skills, jd_skills):
+    # الـ skills الخام بتتبعت بس لو اتطلبت بـ ?debug=true
+    report_json["debug"] = {"cv_skills": cv_skills, "jd_skills": jd_skills}
+    return report_json
+
 @app.post("/analyze")
-async def analyze(cv_file: UploadFile = File(...), job_description: str = Form(...)):
-    
-    temp_path = f"/tmp/{cv_file.filename}"
-    with open(temp_path, "wb") as f:
-        f.write(await cv_file.read())
-
-    # تحليل الـ CV والـ JD
-    cv_skills = extract_skills_for_cv(temp_path)
-    jd_skills = extract_skills_for_jd(job_description)
-    matching_results = build_matching_table(jd_skills, cv_skills)
-    report = build_matching_report(matching_results)
-
-    # تحويل كل شيء لـ JSON-friendly
-    
-    report_json = convert_report(report)
-    report_json["__debug_cv_skills"] = cv_skills
-    report_json["__debug_jd_skills"] = jd_skills
+async def analyze(cv_file: UploadFile = File(...), job_description: str = Form(...), combined: bool = COMBINED_EXTRACTION, debug: bool = False):
+
+    # الملف بيتقرا من الميموري على طول من غير /tmp
+    cv_bytes = await cv_file.read()
+
+    if combined:
+        # generation واحدة للـ CV والـ JD مع بعض
+        cv_skills, jd_skills, extraction_path = await run_blocking(extract_skills_combined, cv_bytes, job_description)
+    else:
+        # تحليل الـ CV والـ JD في نفس الوقت
+        cv_skills, jd_skills = await asyncio.gather(
+            run_blocking(extract_skills_for_cv, cv_bytes),
+            run_blocking(extract_skills_for_jd, job_description),
+        )
+        extraction_path = "separate"
+    report_json = await run_blocking(build_report_json, cv_skills, jd_skills)
+    report_json["extraction_path"] = extraction_path
+
+    if debug:
+        add_debug_info(report_json, cv_skills, jd_skills)
     return JSONResponse(content=report_json)
 
+# =======================
+# endpoint لعدة CVs مقابل JD واحد
+# =======================
+@app.post("/analyze/batch")
+async def analyze_batch(cv_files: List[UploadFile] = File(...), job_description: str = Form(...), debug: bool = False):
+
+    cv_bytes_list = [await cv_file.read() for cv_file in cv_files]
+
+    # الـ JD بيتحلل مرة واحدة والـ CVs كلها في batches
+    jd_skills, cv_skills_list = await asyncio.gather(
+        run_blocking(extract_skills_for_jd, job_description),
+        run_blocking(extract_skills_for_cvs, cv_bytes_list),
+    )
+
+    results = []
+    for cv_file, cv_skills in zip(cv_files, cv_skills_list):
+        report_json = await run_blocking(build_report_json, cv_skills, jd_skills)
+        report_json["filename"] = cv_file.filename
+        if debug:
+            add_debug_info(report_json, cv_skills, jd_skills)
+        results.append(report_json)
+
+    return JSONResponse(content={"results": results})
+
+# =======================
+# مخزن الـ CVs وترتيبهم قدام JD
+# =======================
+@app.post("/candidates")
+async def add_candidates(cv_files: List[UploadFile] = File(...)):
+
+    cv_bytes_list = [await cv_file.read() for cv_file in cv_files]
+    cv_skills_list = await run_blocking(extract_skills_for_cvs, cv_bytes_list)
+
+    # اسم الملف هو الـ id، ولو اتبعت تاني بيتحدث
+    candidate_ids = [cv_file.filename for cv_file in cv_files]
+    store = get_candidate_store()
+    await run_blocking(store.add, list(zip(candidate_ids, cv_skills_list)))
+    return JSONResponse(content={"added": candidate_ids, "total": len(store)})
+
+def rank_candidates(job_description, top_k, weights=None):
+    jd_skills = extract_skills_for_jd(job_description)
+    store = get_candidate_store()
+
+    results = []
+    for candidate_id, score in store.rank(jd_skills, top_k, weights):
+        cv_skills = store.get(candidate_id)
+        if cv_skills is None:
+            # اتمسح بعد الترتيب
+            continue
+        # التقرير الكامل للـ top K بس
+        report_json = build_report_json(cv_skills, jd_skills, weights)
+        report_json["candidate_id"] = candidate_id
+        report_json["rank_score"] = score
+        results.append(report_json)
+    return {"results": results, "pool_size": len(store)}
+
+@app.post("/rank")
+async def rank(job_description: str = Form(...), top_k: int = RANK_TOP_K, weights: str = Form(None)):
+    # أوزان مختلفة لكل request من غير ما نعيد الـ extraction
+    scoring_weights = None
+    if weights:
+        try:
+            scoring_weights = ScoringWeights.from_dict(json.loads(weights))
+        except (ValueError, TypeError) as e:
+            return JSONResponse(content={"detail": f"invalid weights: {e}"}, status_code=400)
+    return JSONResponse(content=await run_blocking(rank_candidates, job_description, top_k, scoring_weights))
+
+# =======================
+# jobs: ابعت التحليل وارجع اسأل عليه بعدين
+# =======================
+def run_analysis(cv_bytes, job_description, combined=COMBINED_EXTRACTION, debug=False):
+    if combined:
+        cv_skills, jd_skills, extraction_path = extract_skills_combined(cv_bytes, job_description)
+    else:
+        cv_skills = extract_skills_for_cv(cv_bytes)
+        jd_skills = extract_skills_for_jd(job_description)
+        extraction_path = "separate"
+    report_json = build_report_json(cv_skills, jd_skills)
+    report_json["extraction_path"] = extraction_path
+    if debug:
+        add_debug_info(report_json, cv_skills, jd_skills)
+    return report_json
+
+register_task("analyze", run_analysis)
+
+@app.post("/jobs")
+async def submit_job(cv_file: UploadFile = File(...), job_description: str = Form(...), debug: bool = False):
+    cv_bytes = await cv_file.read()
+    try:
+        job_id = get_job_queue().submit("analyze", cv_bytes=cv_bytes, job_description=job_description, debug=debug)
+    except QueueFullError as e:
+        return JSONResponse(content={"detail": str(e)}, status_code=429, headers={"Retry-After": "10"})
+    return JSONResponse(content={"job_id": job_id, "status": "queued"}, status_code=202)
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = get_job_queue().status(job_id)
+    if job is None:
+        return JSONResponse(content={"detail": "job not found"}, status_code=404)
+    return JSONResponse(content=job)
+
 # =======================
 # تشغيل السيرفر
 # =======================
-import threading
+
+# API_WORKERS > 1: الموديل بيتحمل مرة واحدة بس في inference worker process
+# والـ API workers بيكلموه (LLM_BACKEND=remote)، فزيادة الـ workers ما بتزودش الميموري
+API_WORKERS = int(os.environ.get("API_WORKERS", "1"))
 
 def run_server():
     uvicorn.run(app, host="0.0.0.0", port=8001)
 
-thread = threading.Thread(target=run_server, daemon=True)
-thread.start()
-print("FastAPI server is running in background!")
+def run_worker_processes():
+    inference_workers = start_inference_workers()
+    # الـ uvicorn workers لازم يتعملوا import من string، فبيشتغلوا في process منفصلة
+    env = {**os.environ, "LLM_BACKEND": "remote"}
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "FastAPI_code:app",
+         "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+         "--host", "0.0.0.0", "--port", "8001", "--workers", str(API_WORKERS)],
+        env=env,
+    )
+
+    # الـ process دي لازم تفضل عايشة لحد ما uvicorn يقفل، وأي signal بيقفل الكل
+    def stop(signum, frame):
+        raise SystemExit(128 + signum)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        return api.wait()
+    finally:
+        if api.poll() is None:
+            api.terminate()
+            try:
+                api.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                api.kill()
+        stop_inference_workers(inference_workers)
+
+# الـ uvicorn workers بيعملوا import للملف ده، فالتشغيل هنا بس
+if __name__ == "__main__":
+    if API_WORKERS > 1:
+        print("FastAPI server is running with", API_WORKERS, "workers")
+        sys.exit(run_worker_processes())
+    else:
+        thread = threading.Thread(target=run_server, daemon=True)
+        thread.start()
+        print("FastAPI server is running in background!")
 
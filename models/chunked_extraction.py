@@ -0,0 +1,86 @@
+import os
+from core.metrics import timed
+from core.llm_engine import count_tokens, generate_text, generate_batch, register_prompt_prefix, STRUCTURED_OUTPUT
+from utils.json_extractor import find_json_object
+from utils.text_chunker import chunk_text
+from utils.text_utils import merge_skills_outputs
+
+# documents longer than this are extracted chunk by chunk and merged
+CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", "3000"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "100"))
+# output that can't be repaired gets one short "fix this JSON" generation instead of a full re-run
+JSON_REPAIR_RETRY = os.environ.get("JSON_REPAIR_RETRY", "1") == "1"
+
+repair_prompt_prefix = """
+    The text below should be a JSON object of the form {"skills": {"programming_languages": [], "frameworks_and_libraries": [], "tools_and_platforms": [], "domain_knowledge": [], "technical_concepts": [], "soft_skills": []}} but it is not valid JSON.
+    Return ONLY the corrected JSON object, keeping every skill it lists.
+
+    TEXT:
+    """
+
+register_prompt_prefix(repair_prompt_prefix)
+
+
+def document_chunks(text):
+    if count_tokens(text) <= CHUNK_MAX_TOKENS:
+        return [text]
+    return chunk_text(text, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, count_tokens)
+
+def build_repair_prompt(broken):
+    return f"{repair_prompt_prefix}{broken}\n    "
+
+def _retry_broken(responses, failed, max_new_tokens):
+    # only the broken object goes back to the model, not the document
+    broken, retried = [], []
+    for i in failed:
+        try:
+            broken.append(find_json_object(responses[i]))
+        except ValueError:
+            # nothing that looks like JSON, there is nothing to fix
+            continue
+        retried.append(i)
+    if not broken:
+        return {}
+    # the answer is about as long as what it fixes
+    budget = min(max_new_tokens, max(count_tokens(b) for b in broken) + 50)
+    fixed = generate_batch([build_repair_prompt(b) for b in broken], max_new_tokens=budget, structured=STRUCTURED_OUTPUT)
+    return dict(zip(retried, fixed))
+
+def extract_documents(texts, build_prompt, parse_response, max_new_tokens=700):
+    """Extract one skills dict per text, running every chunk of every text in one batch."""
+    prompts, owners = [], []
+    for i, text in enumerate(texts):
+        for chunk in document_chunks(text):
+            prompts.append(build_prompt(chunk))
+            owners.append(i)
+
+    if len(prompts) == 1:
+        responses = generate_text(prompts[0], max_new_tokens=max_new_tokens, structured=STRUCTURED_OUTPUT)
+    else:
+        responses = generate_batch(prompts, max_new_tokens=max_new_tokens, structured=STRUCTURED_OUTPUT)
+
+    parsed = [[] for _ in texts]
+    errors = [None for _ in texts]
+    failed = []
+    for i, (owner, response) in enumerate(zip(owners, responses)):
+        try:
+            with timed("parse"):
+                parsed[owner].append(parse_response(response))
+        except Exception as e:
+            errors[owner] = e
+            failed.append(i)
+
+    if failed and JSON_REPAIR_RETRY:
+        for i, response in _retry_broken(responses, failed, max_new_tokens).items():
+            try:
+                parsed[owners[i]].append(parse_response(response))
+            except Exception as e:
+                errors[owners[i]] = e
+
+    outputs = []
+    for i in range(len(texts)):
+        if not parsed[i]:
+            raise errors[i]
+        # a single chunk keeps the model's output as is
+        outputs.append(parsed[i][0] if owners.count(i) == 1 else merge_skills_outputs(parsed[i]))
+    return outputs
@@ -0,0 +1,99 @@
+import os
+from langchain.output_parsers import ResponseSchema, StructuredOutputParser # type: ignore
+from services.read_resume import read_resume # type: ignore
+from services.read_jobDescription import read_job_description, mark_nice_to_have
+from utils.json_extractor import parse_json_object, validate_skills
+from core.llm_engine import count_tokens, generate_text, register_prompt_prefix, STRUCTURED_OUTPUT
+from core.skill_cache import get_skill_cache
+from core.metrics import record_extraction_path, timed
+from models.cv_schema import cv_cache_key, extract_skills_for_cv_text
+from models.job_description_schema import jd_cache_key, extract_skills_for_jd
+from models.chunked_extraction import CHUNK_MAX_TOKENS
+
+# one generation for both documents instead of two (falls back to two on parse errors)
+COMBINED_EXTRACTION = os.environ.get("COMBINED_EXTRACTION", "0") == "1"
+COMBINED_SECTIONS = ("cv_skills", "jd_skills")
+
+cv_skills_schema = ResponseSchema(
+    name="cv_skills",
+    description="Skills mentioned in the CV, as an object with the six category lists. Use [] if not mentioned."
+)
+jd_skills_schema = ResponseSchema(
+    name="jd_skills",
+    description="Skills required by the job description, as an object with the six category lists. Use [] if not mentioned."
+)
+
+output_parser = StructuredOutputParser.from_response_schemas([cv_skills_schema, jd_skills_schema])
+format_instructions = output_parser.get_format_instructions()
+
+combined_prompt_prefix = f"""
+    Extract skills from the CV and from the job description below and return ONLY valid JSON with the following format:
+
+    {{
+      "cv_skills": {{
+        "programming_languages": [],
+        "frameworks_and_libraries": [],
+        "tools_and_platforms": [],
+        "domain_knowledge": [],
+        "technical_concepts": [],
+        "soft_skills": []
+      }},
+      "jd_skills": {{
+        "programming_languages": [],
+        "frameworks_and_libraries": [],
+        "tools_and_platforms": [],
+        "domain_knowledge": [],
+        "technical_concepts": [],
+        "soft_skills": []
+      }}
+    }}
+
+    - Do NOT include explanations, comments, or code blocks.
+    - If a category is empty, keep it as an empty list.
+    - cv_skills holds only skills explicitly mentioned in the CV, jd_skills only skills mentioned in the job description.
+    {format_instructions}
+
+    CV TEXT:
+    """
+
+register_prompt_prefix(combined_prompt_prefix)
+
+def build_combined_prompt(cv_text, job_description):
+    return f"{combined_prompt_prefix}{cv_text}\n    \n    JD Text:\n    {job_description}\n    "
+
+def parse_combined_response(response):
+    output = parse_json_object(response)
+    return validate_skills(output, "cv_skills"), validate_skills(output, "jd_skills")
+
+def extract_skills_combined(cv_file, jd_text):
+    """Return (cv_skills, jd_skills, path) where path is "cached", "combined" or "separate"."""
+    cv_text = read_resume(cv_file)
+    job_description = read_job_description(jd_text)
+    cache = get_skill_cache()
+    cv_key, jd_key = cv_cache_key(cv_text), jd_cache_key(job_description)
+    cv_skills, jd_skills = cache.get(cv_key), cache.get(jd_key)
+
+    if cv_skills is not None and jd_skills is not None:
+        path = "cached"
+    elif cv_skills is not None or jd_skills is not None or count_tokens(cv_text) + count_tokens(job_description) > CHUNK_MAX_TOKENS:
+        # one side is known (a single-document call is cheaper) or the pair is
+        # too long for one prompt and each side needs its own chunking
+        cv_skills = cv_skills or extract_skills_for_cv_text(cv_text)
+        jd_skills = jd_skills or extract_skills_for_jd(jd_text)
+        path = "separate"
+    else:
+        structured = COMBINED_SECTIONS if STRUCTURED_OUTPUT else False
+        response = generate_text(build_combined_prompt(cv_text, job_description), max_new_tokens=1400, structured=structured)[0]
+        try:
+            with timed("parse"):
+                cv_skills, jd_skills = parse_combined_response(response)
+            cache.set(cv_key, cv_skills)
+            cache.set(jd_key, jd_skills)
+            path = "combined"
+        except Exception:
+            cv_skills = extract_skills_for_cv_text(cv_text)
+            jd_skills = extract_skills_for_jd(jd_text)
+            path = "separate"
+
+    record_extraction_path(path)
+    return cv_skills, mark_nice_to_have(jd_skills, job_description), path
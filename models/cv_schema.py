@@ -1,10 +1,14 @@
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser # type: ignore
 from services.read_resume import read_resume # type: ignore
-from utils.json_extractor import extract_json_block 
-from core.llm_engine import generate_text 
-def extract_skills_for_cv(cv_path):
-    cv_text=read_resume(cv_path)
-    skills_schema = ResponseSchema(
+from utils.json_extractor import parse_skills_response
+from core.llm_engine import register_prompt_prefix, model_name, model_variant, decoding_mode
+from core.skill_cache import get_skill_cache, make_key
+from models.chunked_extraction import extract_documents
+
+# bump when the prompt or parser changes so cached results are not reused
+PROMPT_VERSION = "cv-v4"
+
+skills_schema = ResponseSchema(
     name="skills",
     description="""
 Structured list of skills categorized as follows:
@@ -17,13 +21,13 @@ Structured list of skills categorized as follows:
 Return empty lists if a category is not mentioned.
 """
 )
-    
-    cv_schema=[skills_schema]
-    output_parser=StructuredOutputParser.from_response_schemas(cv_schema)
-    format_instructions=output_parser.get_format_instructions()
 
+cv_schema=[skills_schema]
+output_parser=StructuredOutputParser.from_response_schemas(cv_schema)
+format_instructions=output_parser.get_format_instructions()
 
-    cv_prompt = f"""
+
+cv_prompt_prefix = f"""
     Extract skills from the CV below and return ONLY valid JSON with the following format:
     
     {{
@@ -43,15 +47,49 @@ Return empty lists if a category is not mentioned.
     {format_instructions}
     
     CV TEXT:
-    {cv_text}
     """
 
+register_prompt_prefix(cv_prompt_prefix)
 
+def build_cv_prompt(cv_text):
+    # everything before the document is constant, the engine caches it
+    return f"{cv_prompt_prefix}{cv_text}\n    "
 
+def parse_cv_response(cv_response):
+    # finds, repairs and validates the skills object in the raw output
+    return parse_skills_response(cv_response)
 
-    
-    cv_response=generate_text(cv_prompt,max_new_tokens=700)[0]
-    cv_json=extract_json_block(cv_response)
-    cv_output = output_parser.parse(cv_json)
+def cv_cache_key(cv_text):
+    return make_key(f"{model_name}:{model_variant()}","cv",f"{PROMPT_VERSION}:{decoding_mode()}",cv_text)
+
+def extract_skills_for_cv(cv_file):
+    # cv_file can be a path, the PDF bytes or a file object
+    return extract_skills_for_cv_text(read_resume(cv_file))
+
+def extract_skills_for_cv_text(cv_text):
+    cache=get_skill_cache()
+    key=cv_cache_key(cv_text)
+    cached=cache.get(key)
+    if cached is not None:
+        return cached
+
+    cv_output=extract_documents([cv_text],build_cv_prompt,parse_cv_response)[0]
+    cache.set(key,cv_output)
     return cv_output
 
+def extract_skills_for_cvs(cv_files):
+    return extract_skills_for_cv_texts([read_resume(cv_file) for cv_file in cv_files])
+
+def extract_skills_for_cv_texts(cv_texts):
+    cache=get_skill_cache()
+    keys=[cv_cache_key(cv_text) for cv_text in cv_texts]
+    outputs=[cache.get(key) for key in keys]
+
+    # only the CVs that are not cached go to the model
+    missing=[i for i, output in enumerate(outputs) if output is None]
+    if missing:
+        extracted=extract_documents([cv_texts[i] for i in missing],build_cv_prompt,parse_cv_response)
+        for i, cv_output in zip(missing, extracted):
+            outputs[i]=cv_output
+            cache.set(keys[i],cv_output)
+    return outputs
@@ -1,13 +1,20 @@
-from services.read_jobDescription import read_job_description
+import os
+from services.read_jobDescription import read_job_description, jd_sections, mark_nice_to_have
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser # type: ignore
-from utils.json_extractor import extract_json_block 
-from core.llm_engine import generate_text
-def extract_skills_for_jd(jd_text):
-    job_description = read_job_description(jd_text)
+from utils.json_extractor import parse_skills_response
+from core.llm_engine import register_prompt_prefix, model_name, model_variant, decoding_mode
+from core.skill_cache import get_skill_cache, make_key
+from models.chunked_extraction import extract_documents
+from utils.text_utils import merge_skills_outputs
+
+# bump when the prompt or parser changes so cached results are not reused
+PROMPT_VERSION = "jd-v4"
+# extract and cache the JD section by section, so an edited JD only re-runs the changed sections
+JD_INCREMENTAL = os.environ.get("JD_INCREMENTAL", "0") == "1"
 
-    skills_schema = ResponseSchema(
-        name="skills",
-        description="""
+skills_schema = ResponseSchema(
+    name="skills",
+    description="""
 A structured object with the following fields:
 - programming_languages
 - frameworks_and_libraries
@@ -18,12 +25,13 @@ A structured object with the following fields:
 
 All values must be lists. Use [] if not mentioned.
 """
-    )
+)
 
-    output_parser = StructuredOutputParser.from_response_schemas([skills_schema])
-    format_instructions = output_parser.get_format_instructions()
+output_parser = StructuredOutputParser.from_response_schemas([skills_schema])
+format_instructions = output_parser.get_format_instructions()
 
-    jd_prompt = f"""
+
+jd_prompt_prefix = f"""
     Extract skills from the job description below and return ONLY valid JSON with the following format:
     
     {{
@@ -43,10 +51,54 @@ All values must be lists. Use [] if not mentioned.
     {format_instructions}
     
     JD Text:
-    {job_description}
     """
 
-    jd_response = generate_text(jd_prompt, max_new_tokens=700)[0]
-    jd_json = extract_json_block(jd_response)
-    jd_output= output_parser.parse(jd_json)
+register_prompt_prefix(jd_prompt_prefix)
+
+def build_jd_prompt(job_description):
+    # everything before the document is constant, the engine caches it
+    return f"{jd_prompt_prefix}{job_description}\n    "
+
+def parse_jd_response(jd_response):
+    return parse_skills_response(jd_response)
+
+def jd_cache_key(job_description):
+    return make_key(f"{model_name}:{model_variant()}", "jd", f"{PROMPT_VERSION}:{decoding_mode()}", job_description)
+
+def jd_section_key(section):
+    return make_key(f"{model_name}:{model_variant()}", "jd-section", f"{PROMPT_VERSION}:{decoding_mode()}", section)
+
+def extract_skills_for_jd_sections(job_description):
+    cache = get_skill_cache()
+    sections = jd_sections(job_description)
+    keys = [jd_section_key(section) for section in sections]
+    outputs = [cache.get(key) for key in keys]
+
+    # unchanged sections come from the cache, the rest go through the model in one batch
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    if missing:
+        extracted = extract_documents([sections[i] for i in missing], build_jd_prompt, parse_jd_response)
+        for i, output in zip(missing, extracted):
+            cache.set(keys[i], output)
+            outputs[i] = output
+
+    return outputs[0] if len(outputs) == 1 else merge_skills_outputs(outputs)
+
+def extract_skills_for_jd_text(job_description):
+    if JD_INCREMENTAL:
+        return extract_skills_for_jd_sections(job_description)
+
+    cache = get_skill_cache()
+    key = jd_cache_key(job_description)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    jd_output = extract_documents([job_description], build_jd_prompt, parse_jd_response)[0]
+    cache.set(key, jd_output)
     return jd_output
+
+def extract_skills_for_jd(jd_text):
+    job_description = read_job_description(jd_text)
+    # cheap and independent of the model, so worked out on every call instead of cached
+    return mark_nice_to_have(extract_skills_for_jd_text(job_description), job_description)
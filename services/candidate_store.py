@@ -0,0 +1,220 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from utils.scoring import NO, PARTIAL, YES, get_scoring_weights, jd_skill_codes
+from utils.text_utils import iter_skills, matchable_skills, skill_key, skill_key_version
+
+CANDIDATE_STORE_PATH = os.environ.get("CANDIDATE_STORE_PATH", "data/candidates.sqlite3")
+RANK_TOP_K = int(os.environ.get("RANK_TOP_K", "20"))
+# per-JD-skill match codes over the pool are kept, an edited JD only matches its new skills
+RANK_SKILL_CACHE = int(os.environ.get("RANK_SKILL_CACHE", "512"))
+
+_NOT_FOUND = np.iinfo(np.int32).max
+
+def _skill_keys(cv_skills):
+    return [skill_key(skill) for skill in iter_skills(cv_skills)]
+
+
+class CandidateStore:
+    """Extracted CV skills kept in SQLite, with an in-memory inverted index for ranking.
+
+    Every distinct skill key (``skill_key``) has a posting list of (candidate row, first
+    position of the skill in that CV). Ranking a JD only reads the postings of
+    stored skills sharing a token with a JD skill, so CVs with nothing in common
+    are never looked at. Match codes are cached per JD skill and weighted at
+    ranking time, so scores are the same as ``build_matching_report`` without
+    the semantic tier, for any ScoringWeights.
+    """
+
+    def __init__(self, path=CANDIDATE_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._loaded = False
+
+        self.ids = []
+        self.rows = {}
+        self.alive = bytearray()
+        self.skill_ids = {}
+        self.token_skills = {}
+        self.posting_rows = []
+        self.posting_positions = []
+        self._skill_codes = OrderedDict()
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS candidates ("
+                "id TEXT PRIMARY KEY, skills TEXT NOT NULL, normalized TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._rebuild_keys()
+            self._conn.commit()
+        return self._conn
+
+    def _rebuild_keys(self):
+        # the stored keys depend on the split words and aliases, redo them from
+        # the raw skills when those changed since the rows were written
+        version = skill_key_version()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] == version:
+            return
+        rows = self._conn.execute("SELECT id, skills FROM candidates").fetchall()
+        self._conn.executemany(
+            "UPDATE candidates SET normalized = ? WHERE id = ?",
+            [(json.dumps(_skill_keys(json.loads(skills))), candidate_id) for candidate_id, skills in rows],
+        )
+        self._conn.execute(f"PRAGMA user_version = {version}")
+
+    def _load(self):
+        if self._loaded:
+            return
+        # normalized skills are stored, so loading 100k CVs is only JSON decoding
+        for candidate_id, normalized in self._connect().execute("SELECT id, normalized FROM candidates"):
+            self._index(candidate_id, json.loads(normalized))
+        self._loaded = True
+
+    def load(self):
+        """Build the index now instead of on the first request."""
+        with self._lock:
+            self._load()
+
+    def _index(self, candidate_id, normalized):
+        old = self.rows.get(candidate_id)
+        if old is not None:
+            self.alive[old] = 0
+        row = len(self.ids)
+        self.ids.append(candidate_id)
+        self.rows[candidate_id] = row
+        self.alive.append(1)
+
+        seen = set()
+        for position, skill in enumerate(normalized):
+            if skill in seen:
+                continue
+            seen.add(skill)
+            sid = self.skill_ids.get(skill)
+            if sid is None:
+                sid = self.skill_ids[skill] = len(self.posting_rows)
+                self.posting_rows.append(array("i"))
+                self.posting_positions.append(array("i"))
+                for token in set(skill.split()):
+                    self.token_skills.setdefault(token, []).append(sid)
+            self.posting_rows[sid].append(row)
+            self.posting_positions[sid].append(position)
+
+    def add(self, candidates):
+        """Store [(candidate_id, cv_skills), ...]; an existing id is replaced."""
+        normalized = [_skill_keys(cv_skills) for _, cv_skills in candidates]
+        with self._lock:
+            self._load()
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO candidates (id, skills, normalized, updated) VALUES (?, ?, ?, ?)",
+                [
+                    (candidate_id, json.dumps(cv_skills), json.dumps(skills), time.time())
+                    for (candidate_id, cv_skills), skills in zip(candidates, normalized)
+                ],
+            )
+            conn.commit()
+            for (candidate_id, _), skills in zip(candidates, normalized):
+                self._index(candidate_id, skills)
+            self._skill_codes.clear()
+
+    def remove(self, candidate_id):
+        with self._lock:
+            self._load()
+            conn = self._connect()
+            conn.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,))
+            conn.commit()
+            row = self.rows.pop(candidate_id, None)
+            if row is not None:
+                self.alive[row] = 0
+                self._skill_codes.clear()
+
+    def get(self, candidate_id):
+        with self._lock:
+            row = self._connect().execute("SELECT skills FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self.rows)
+
+    def _codes(self, jd):
+        # the SkillIndex.match rule for every CV at once: the first CV skill
+        # with >= 30% token overlap decides, Yes if it is the JD skill itself.
+        # Returns (rows, codes) for the CVs that are not NO.
+        cached = self._skill_codes.get(jd)
+        if cached is not None:
+            self._skill_codes.move_to_end(jd)
+            return cached
+
+        rows, codes = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8)
+        jd_tokens = set(jd.split())
+        overlaps = Counter(sid for token in jd_tokens for sid in self.token_skills.get(token, ()))
+        hits = [sid for sid, overlap in overlaps.items() if overlap / len(jd_tokens) >= 0.3]
+        if hits:
+            hit_rows = np.concatenate([np.frombuffer(self.posting_rows[sid], dtype=np.int32) for sid in hits])
+            positions = np.concatenate([np.frombuffer(self.posting_positions[sid], dtype=np.int32) for sid in hits])
+            first = np.full(len(self.ids), _NOT_FOUND, dtype=np.int32)
+            np.minimum.at(first, hit_rows, positions)
+
+            full = np.where(first != _NOT_FOUND, PARTIAL, NO).astype(np.int8)
+            exact = self.skill_ids.get(jd)
+            if exact is not None:
+                exact_rows = np.frombuffer(self.posting_rows[exact], dtype=np.int32)
+                exact_positions = np.frombuffer(self.posting_positions[exact], dtype=np.int32)
+                full[exact_rows[first[exact_rows] == exact_positions]] = YES
+            rows = np.flatnonzero(full != NO).astype(np.int32)
+            codes = full[rows]
+
+        self._skill_codes[jd] = (rows, codes)
+        if len(self._skill_codes) > RANK_SKILL_CACHE:
+            self._skill_codes.popitem(last=False)
+        return rows, codes
+
+    def rank(self, jd_skills, top_k=RANK_TOP_K, weights=None):
+        """[(candidate_id, score), ...] of the top_k stored CVs with a score above 0, best first."""
+        weights = weights or get_scoring_weights()
+        skills, categories, requirements = jd_skill_codes(matchable_skills(jd_skills))
+        skill_weights = weights.skill_weights(categories, requirements)
+        jd_total = float(skill_weights.sum())
+        with self._lock:
+            self._load()
+            if not jd_total or not self.rows or top_k <= 0:
+                return []
+
+            # every CV starts at the No weight, matched rows add the difference
+            totals = np.full(len(self.ids), weights.status[NO] * jd_total, dtype=np.float64)
+            for skill, skill_weight in zip(skills, skill_weights):
+                rows, codes = self._codes(skill_key(skill))
+                totals[rows] += (weights.status[codes] - weights.status[NO]) * skill_weight
+            totals[np.frombuffer(self.alive, dtype=np.uint8) == 0] = 0.0
+
+            found = np.flatnonzero(totals > 0)
+            if len(found) > top_k:
+                found = found[np.argpartition(-totals[found], top_k - 1)[:top_k]]
+            found = sorted(found, key=lambda row: (-totals[row], row))
+            return [(self.ids[row], round(float(totals[row]) / jd_total * 100, 2)) for row in found]
+
+
+_candidate_store = None
+_store_lock = threading.Lock()
+
+def get_candidate_store():
+    global _candidate_store
+    with _store_lock:
+        if _candidate_store is None:
+            _candidate_store = CandidateStore()
+    return _candidate_store
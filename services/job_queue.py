@@ -0,0 +1,149 @@
+import base64
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "32"))
+# finished jobs are kept this long (seconds) for polling
+JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", "3600"))
+# e.g. redis://localhost:6379/0, shares the queue between API processes
+JOB_QUEUE_URL = os.environ.get("JOB_QUEUE_URL")
+
+TASKS = {}
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def register_task(name, func):
+    """Make func runnable as a job; it gets the job kwargs and returns a JSON-friendly result."""
+    TASKS[name] = func
+
+def _run_task(task, kwargs):
+    try:
+        return "done", TASKS[task](**kwargs), None
+    except Exception as e:
+        traceback.print_exc()
+        return "failed", None, repr(e)
+
+
+class JobQueue:
+    """In-process queue with a fixed pool of worker threads and a bounded backlog."""
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, result_ttl=JOB_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, task, **kwargs):
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            self._jobs[job_id] = {"job_id": job_id, "status": "queued", "submitted_at": time.time()}
+        try:
+            self._pending.put_nowait((job_id, task, kwargs))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            raise QueueFullError("job queue is full, try again later")
+        return job_id
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _work(self):
+        while True:
+            job_id, task, kwargs = self._pending.get()
+            self._update(job_id, status="running", started_at=time.time())
+            status, result, error = _run_task(task, kwargs)
+            self._update(job_id, status=status, result=result, error=error, finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.get("finished_at", time.time()) < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _encode(value):
+    # job kwargs carry the raw PDF, JSON can't hold bytes directly
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    return value
+
+def _decode(value):
+    if isinstance(value, dict) and "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+class RedisJobQueue:
+    """Same interface as JobQueue, backed by a Redis list so several API processes share the work."""
+
+    def __init__(self, url=JOB_QUEUE_URL, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, result_ttl=JOB_RESULT_TTL, prefix="resume-jobs"):
+        import redis # pyright: ignore[reportMissingImports]
+
+        self.redis = redis.Redis.from_url(url)
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.queue_key = f"{prefix}:pending"
+        self.job_prefix = f"{prefix}:job:"
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, task, **kwargs):
+        if self.redis.llen(self.queue_key) >= self.max_pending:
+            raise QueueFullError("job queue is full, try again later")
+
+        job_id = uuid.uuid4().hex
+        self._save({"job_id": job_id, "status": "queued", "submitted_at": time.time()})
+        payload = {"job_id": job_id, "task": task, "kwargs": {k: _encode(v) for k, v in kwargs.items()}}
+        self.redis.lpush(self.queue_key, json.dumps(payload))
+        return job_id
+
+    def status(self, job_id):
+        raw = self.redis.get(self.job_prefix + job_id)
+        return json.loads(raw) if raw is not None else None
+
+    def _save(self, job):
+        self.redis.set(self.job_prefix + job["job_id"], json.dumps(job), ex=self.result_ttl)
+
+    def _work(self):
+        while True:
+            _, raw = self.redis.brpop(self.queue_key)
+            payload = json.loads(raw)
+            job = self.status(payload["job_id"]) or {"job_id": payload["job_id"]}
+            job.update(status="running", started_at=time.time())
+            self._save(job)
+
+            kwargs = {k: _decode(v) for k, v in payload["kwargs"].items()}
+            status, result, error = _run_task(payload["task"], kwargs)
+            job.update(status=status, result=result, error=error, finished_at=time.time())
+            self._save(job)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue():
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = RedisJobQueue() if JOB_QUEUE_URL else JobQueue()
+    return _job_queue
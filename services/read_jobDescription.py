@@ -1,11 +1,92 @@
-from langchain.text_splitter import CharacterTextSplitter # pyright: ignore[reportMissingImports]
-def read_job_description(job_description_text, chunk_size=500, chunk_overlap=50):
-    text_splitter = CharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
-    )
+import os
+import re
 
-    chunks = text_splitter.split_text(job_description_text)
-    jd_text = "\n\n".join(chunks)
+# incremental JD extraction works on sections: one per paragraph, with short
+# one-line paragraphs (headings like "Requirements:") joined to the one after them
+JD_SECTION_MIN_CHARS = int(os.environ.get("JD_SECTION_MIN_CHARS", "80"))
+JD_SECTION_MAX_CHARS = int(os.environ.get("JD_SECTION_MAX_CHARS", "1500"))
 
-    return jd_text
\ No newline at end of file
+def read_job_description(job_description_text):
+    # normalize paragraph breaks; chunking for the prompt happens at extraction time
+    paragraphs = re.split(r"\n\s*\n", job_description_text)
+    jd_text = "\n\n".join(p.strip() for p in paragraphs if p.strip())
+
+    return jd_text
+
+def _paragraph_units(paragraph):
+    # a long paragraph (a whole bullet list without blank lines) is cut on lines
+    if len(paragraph) <= JD_SECTION_MAX_CHARS:
+        return [paragraph]
+    units, current, size = [], [], 0
+    for line in paragraph.split("\n"):
+        if current and size + len(line) > JD_SECTION_MAX_CHARS:
+            units.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        units.append("\n".join(current))
+    return units
+
+def _joins_next(unit):
+    # decided by the unit alone, so an edit elsewhere never moves this boundary
+    return "\n" not in unit and len(unit) < JD_SECTION_MIN_CHARS
+
+def jd_sections(job_description):
+    """Split a normalized JD so that editing one part leaves the other sections unchanged."""
+    sections, pending = [], []
+    for paragraph in job_description.split("\n\n"):
+        for unit in _paragraph_units(paragraph):
+            pending.append(unit)
+            if not _joins_next(unit):
+                sections.append("\n\n".join(pending))
+                pending = []
+    if pending:
+        sections.append("\n\n".join(pending))
+    return sections
+
+# lines under a heading like "Nice to have:" or carrying such a phrase themselves
+_OPTIONAL_MARKER = re.compile(
+    r"nice[\s-]to[\s-]have|good[\s-]to[\s-]have|bonus|preferred|optional|(?:is|are|would be) a (?:big )?plus",
+    re.IGNORECASE
+)
+# a heading without a colon has to be one of the usual JD section titles,
+# a short line like "Docker" under "Nice to have:" is a list item
+_HEADING = re.compile(
+    r"^[#*\s]*(?:(?:key|core|basic|minimum|preferred|required|technical|additional)\s+)?"
+    r"(?:requirements|responsibilities|qualifications|skills|experience|benefits|perks|"
+    r"preferred|optional|nice[\s-]to[\s-]haves?|good[\s-]to[\s-]haves?|must[\s-]haves?|bonus(?:\s+points)?|"
+    r"about\s+(?:us|you|the\s+role|the\s+job)|the\s+role|who\s+you\s+are|what\s+you(?:'ll|\s+will)\s+do)"
+    r"[*\s]*$",
+    re.IGNORECASE
+)
+
+def _is_heading(line):
+    return line.endswith(":") or bool(_HEADING.match(line))
+
+def optional_lines(job_description):
+    lines, in_section = [], False
+    for line in job_description.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        marked = bool(_OPTIONAL_MARKER.search(line))
+        if _is_heading(line):
+            in_section = marked
+        lines.append((line.lower(), in_section or marked))
+    return lines
+
+def mark_nice_to_have(jd_skills, job_description):
+    """Copy of jd_skills with a "nice_to_have" list: the skills only mentioned in optional lines.
+
+    A skill the JD text does not spell out (the model reworded it) stays required.
+    """
+    lines = optional_lines(job_description)
+    nice_to_have = []
+    for skills in jd_skills["skills"].values():
+        for skill in skills:
+            pattern = re.compile(r"(?<!\w)" + re.escape(skill.lower()) + r"(?!\w)")
+            found = [optional for line, optional in lines if pattern.search(line)]
+            if found and all(found):
+                nice_to_have.append(skill)
+    return {**jd_skills, "nice_to_have": nice_to_have}
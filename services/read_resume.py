@@ -1,10 +1,114 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 import pdfplumber # pyright: ignore[reportMissingImports]
 
-def read_resume(cv_path):
-    text = ""
-    with pdfplumber.open(cv_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
+try:
+    import pypdfium2 as pdfium # pyright: ignore[reportMissingImports]
+except ImportError:
+    pdfium = None
+
+from core.metrics import timed
+
+# the prompt can't use more than this, so don't extract it
+MAX_PAGES = int(os.environ.get("RESUME_MAX_PAGES", "30"))
+MAX_CHARS = int(os.environ.get("RESUME_MAX_CHARS", "24000"))
+# documents with more pages than this are split across worker processes
+PARALLEL_MIN_PAGES = int(os.environ.get("RESUME_PARALLEL_MIN_PAGES", "8"))
+PAGE_WORKERS = int(os.environ.get("RESUME_PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _as_pdf_input(cv_source):
+    # paths and file objects go straight through, raw bytes need a file object
+    if isinstance(cv_source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(cv_source)
+    return cv_source
+
+def iter_resume_pages(cv_source, max_pages=MAX_PAGES, start=0):
+    """Yield the text of each page, opening and releasing one page at a time."""
+    with pdfplumber.open(_as_pdf_input(cv_source)) as pdf:
+        stop = min(len(pdf.pages), start + max_pages)
+        for i in range(start, stop):
+            page = pdf.pages[i]
+            yield page.extract_text() or ""
+            page.close()
+
+def _extract_page_range(cv_source, start, stop):
+    return list(iter_resume_pages(cv_source, max_pages=stop - start, start=start))
+
+def _fast_pages(cv_source, max_pages):
+    # pdfium reads the text layer directly, much faster than pdfplumber's layout analysis
+    pdf = pdfium.PdfDocument(cv_source)
+    try:
+        for i in range(min(len(pdf), max_pages)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            yield textpage.get_text_range().replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+def _is_clean_text(pages):
+    text = "".join(pages)
+    if len(text.strip()) < 100:
+        return False
+    # a broken text layer shows up as replacement or control characters
+    bad = sum(1 for ch in text if ch == "�" or (ord(ch) < 32 and ch not in "\n\t"))
+    return bad / len(text) < 0.01
+
+def _page_count(cv_source):
+    with pdfplumber.open(_as_pdf_input(cv_source)) as pdf:
+        return len(pdf.pages)
+
+def _parallel_pages(cv_source, page_count):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API process is multithreaded and may hold the model,
+            # forking it risks deadlocks and copies all of that memory
+            _pool = ProcessPoolExecutor(max_workers=PAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    if isinstance(cv_source, (bytearray, memoryview)):
+        cv_source = bytes(cv_source)
+
+    step = -(-page_count // PAGE_WORKERS)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    futures = [_pool.submit(_extract_page_range, cv_source, start, stop) for start, stop in ranges]
+    for future in futures:
+        yield from future.result()
+
+def resume_pages(cv_source, max_pages=MAX_PAGES, fast=True):
+    """Page texts of a CV given as a path, bytes or a binary file object."""
+    if hasattr(cv_source, "read"):
+        cv_source = cv_source.read()
+
+    if fast and pdfium is not None:
+        try:
+            pages = list(_fast_pages(cv_source, max_pages))
+        except Exception:
+            pages = []
+        if _is_clean_text(pages):
+            return pages
+
+    page_count = min(_page_count(cv_source), max_pages)
+    if PAGE_WORKERS > 1 and page_count > PARALLEL_MIN_PAGES:
+        return _parallel_pages(cv_source, page_count)
+    return iter_resume_pages(cv_source, max_pages)
+
+def read_resume(cv_path, max_pages=MAX_PAGES, max_chars=MAX_CHARS, fast=True):
+    parts = []
+    size = 0
+    with timed("read_resume"):
+        for page_text in resume_pages(cv_path, max_pages=max_pages, fast=fast):
             if page_text:
-                text += page_text + "\n"
-    return text
+                parts.append(page_text + "\n")
+                size += len(page_text) + 1
+            if size >= max_chars:
+                break
+    return "".join(parts)[:max_chars]
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from core.batch_scheduler import BatchScheduler
+
+
+def upper_batch(prompts, **kwargs):
+    return [prompt.upper() for prompt in prompts]
+
+
+def test_prompts_arriving_together_share_a_batch():
+    batches = []
+    started, release = threading.Event(), threading.Event()
+    def run_batch(prompts, **kwargs):
+        batches.append(list(prompts))
+        started.set()
+        release.wait(5)
+        return upper_batch(prompts)
+
+    scheduler = BatchScheduler(run_batch, max_wait_ms=50, max_batch_size=8)
+    first = scheduler.submit("a")
+    assert started.wait(5)
+    # queued while the first batch runs, collected as one batch afterwards
+    rest = [scheduler.submit(prompt) for prompt in "bcd"]
+    release.set()
+    assert first.result(5) == "A"
+    assert [future.result(5) for future in rest] == ["B", "C", "D"]
+    assert batches == [["a"], ["b", "c", "d"]]
+    assert scheduler.metrics()["batches"] == 2
+
+def test_run_batch_error_reaches_the_callers_and_the_loop_keeps_running():
+    calls = []
+    def run_batch(prompts, **kwargs):
+        calls.append(prompts)
+        if len(calls) == 1:
+            raise ValueError("out of memory")
+        return upper_batch(prompts)
+
+    scheduler = BatchScheduler(run_batch, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        scheduler.submit("a").result(5)
+    assert scheduler.submit("b").result(5) == "B"
+
+def test_short_reply_fails_every_future_of_the_batch():
+    scheduler = BatchScheduler(lambda prompts, **kwargs: [], max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        scheduler.submit("a").result(5)
+
+def test_error_outside_run_batch_does_not_stop_the_loop():
+    scheduler = BatchScheduler(upper_batch, max_wait_ms=1)
+    # a prompt that breaks the token estimate, before run_batch is reached
+    with pytest.raises(TypeError):
+        scheduler.submit(None).result(5)
+    assert scheduler.submit("ok").result(5) == "OK"
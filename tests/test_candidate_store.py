@@ -0,0 +1,47 @@
+import random
+
+from services.candidate_store import CandidateStore
+from utils.constants import SKILL_CATEGORIES
+from utils.scoring import ScoringWeights
+from utils.text_utils import build_compact_report, build_matching_table
+
+TOKENS = ["python", "java", "script", "machine", "learning", "aws", "lambda", "sql", "data", "c++", "+++", "-", "drf"]
+
+
+def random_skill(rng):
+    return " ".join(rng.sample(TOKENS, rng.randint(1, 3)))
+
+def random_skills(rng, n):
+    skills = {category: [] for category in SKILL_CATEGORIES}
+    for _ in range(n):
+        skills[rng.choice(SKILL_CATEGORIES)].append(random_skill(rng))
+    return {"skills": skills}
+
+
+def test_rank_scores_match_compact_report(tmp_path):
+    rng = random.Random(20)
+    cvs = {f"cv{i}": random_skills(rng, rng.randint(0, 10)) for i in range(60)}
+    store = CandidateStore(str(tmp_path / "candidates.sqlite3"))
+    store.add(list(cvs.items()))
+    weights = ScoringWeights(category={"soft_skills": 2.0}, requirement={"nice_to_have": 0.25})
+
+    for _ in range(30):
+        jd = random_skills(rng, rng.randint(1, 8))
+        jd_skills = [skill for skills in jd["skills"].values() for skill in skills]
+        jd["nice_to_have"] = rng.sample(jd_skills, rng.randint(0, len(jd_skills)))
+        for w in (None, weights):
+            expected = {
+                candidate_id: build_compact_report(build_matching_table(jd, cv_skills), w)["final_score"]
+                for candidate_id, cv_skills in cvs.items()
+            }
+            ranked = dict(store.rank(jd, top_k=len(cvs), weights=w))
+            assert ranked == {candidate_id: score for candidate_id, score in expected.items() if score > 0}
+
+def test_symbol_only_jd_skill_is_ignored(tmp_path):
+    store = CandidateStore(str(tmp_path / "candidates.sqlite3"))
+    cv = {"skills": {"technical_concepts": ["+++", "python"]}}
+    store.add([("a", cv)])
+    jd = {"skills": {"technical_concepts": ["-", "Python"]}}
+    report = build_compact_report(build_matching_table(jd, cv))
+    assert report["final_score"] == 100.0
+    assert store.rank(jd) == [("a", 100.0)]
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from utils.constants import SKILL_CATEGORIES
+from utils.json_extractor import find_json_object, parse_json_object, parse_skills_response, repair_json
+
+
+@pytest.mark.parametrize("broken, expected", [
+    ('{"a": [1, 2,],}', {"a": [1, 2]}),
+    ('{"skills": {"programming_languages": ["Python", "Ja', {"skills": {"programming_languages": ["Python"]}}),
+    ('{"skills": {"tools_and_platforms": ["Docker",', {"skills": {"tools_and_platforms": ["Docker"]}}),
+    ("{'a': True, 'b': None}", {"a": True, "b": None}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('{"a": [1, 2}', {"a": [1, 2]}),
+])
+def test_repair_json(broken, expected):
+    assert json.loads(repair_json(broken)) == expected
+
+def test_find_json_object_skips_braces_in_strings():
+    assert find_json_object('x {"a": "}{"} y') == '{"a": "}{"}'
+
+def test_parse_skills_response_trailing_commas_in_fence():
+    text = 'Here you go:\n```json\n{"skills": {"programming_languages": ["Python", "SQL",], "soft_skills": ["Teamwork"],}}\n```'
+    skills = parse_skills_response(text)["skills"]
+    assert list(skills) == list(SKILL_CATEGORIES)
+    assert skills["programming_languages"] == ["Python", "SQL"]
+    assert skills["soft_skills"] == ["Teamwork"]
+    assert skills["domain_knowledge"] == []
+
+def test_parse_skills_response_truncated_output_uses_last_object():
+    # the prompt's own example object comes first, the cut-off answer last
+    text = 'format: {"skills": {"soft_skills": []}} answer: {"skills": {"programming_languages": ["Python", "Ja'
+    skills = parse_skills_response(text)["skills"]
+    assert skills["programming_languages"] == ["Python"]
+    assert skills["soft_skills"] == []
+
+def test_parse_json_object_without_json():
+    with pytest.raises(ValueError):
+        parse_json_object("no json here")
+
+@pytest.mark.parametrize("cv_text", ["Wrote templates like {{ name", 'He said "hi {" ok'])
+def test_parse_skills_response_unmatched_brace_in_echoed_prompt(cv_text):
+    # outside structured mode the output starts with the prompt, CV text included
+    text = f'CV TEXT:\n{cv_text}\n```json\n{{"skills": {{"programming_languages": ["Python"]}}}}\n```'
+    assert parse_skills_response(text)["skills"]["programming_languages"] == ["Python"]
+
+def test_parse_skills_response_truncated_fence():
+    text = 'CV TEXT:\nuses {braces\n```json\n{"skills": {"soft_skills": ["Teamwork", "Lea'
+    assert parse_skills_response(text)["skills"]["soft_skills"] == ["Teamwork"]
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils import scoring
+from utils.scoring import (NO, PARTIAL, SEMANTIC, YES, ScoringWeights, decision_for, get_scoring_weights,
+                           jd_skill_codes, load_scoring_weights, recommendation_for)
+from utils.text_utils import build_compact_report, build_matching_table
+
+
+def test_labels_use_the_thresholds():
+    assert decision_for(80) == "Strong Fit 💪"
+    assert decision_for(79.99) == "Good Fit 👍"
+    assert decision_for(0) == "Needs Improvement ⚠️"
+    assert recommendation_for(75) == "✅ Strong fit for the role"
+    assert recommendation_for(50).startswith("⚠️")
+    assert recommendation_for(49.9).startswith("❌")
+
+def test_unknown_weight_names_are_refused():
+    with pytest.raises(ValueError):
+        ScoringWeights(category={"cooking": 2.0})
+    with pytest.raises(ValueError):
+        ScoringWeights.from_dict({"statuses": {}})
+
+def test_rows_and_matrix_give_the_same_score():
+    weights = ScoringWeights(status={"Partial": 0.25}, category={"technical_concepts": 3.0, "soft_skills": 0.1},
+                             requirement={"nice_to_have": 0.2})
+    jd_skills = {
+        "skills": {"programming_languages": ["python", "go"], "soft_skills": ["teamwork"], "hobbies": ["chess"]},
+        "nice_to_have": ["go"],
+    }
+    present = ["Yes", "Partial", "Semantic", "No"]
+    codes = np.asarray([[YES, PARTIAL, SEMANTIC, NO]])
+    rows = []
+    for category, skills in jd_skills["skills"].items():
+        for skill in skills:
+            rows.append({"Category": category, "Required": skill != "go", "Present": present[len(rows)]})
+
+    _, categories, requirements = jd_skill_codes(jd_skills)
+    # "hobbies" is not one of the six categories, both paths weigh it like technical_concepts
+    assert weights.skill_weight("hobbies") == 3.0
+    matrix_score = weights.score_matrix(codes, weights.skill_weights(categories, requirements))[0]
+    assert matrix_score == weights.score_rows(rows)
+
+def test_load_scoring_weights_replaces_the_defaults(tmp_path):
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps({"status": {"Partial": 0.0}}))
+    previous = get_scoring_weights()
+    cv = {"skills": {"technical_concepts": ["machine learning"]}}
+    jd = {"skills": {"technical_concepts": ["machine learning", "deep learning"]}}
+    try:
+        loaded = load_scoring_weights(str(path))
+        assert get_scoring_weights() is loaded and loaded is not previous
+        assert build_compact_report(build_matching_table(jd, cv))["final_score"] == 50.0
+        # the weights that were in use before are left as they were
+        assert previous.status_weight("Partial") == 0.5
+    finally:
+        scoring._scoring_weights = previous
+    assert build_compact_report(build_matching_table(jd, cv))["final_score"] == 75.0
@@ -0,0 +1,51 @@
+import random
+
+from utils.skill_matrix import SkillMatrix
+from utils.text_utils import SkillIndex, skill_key
+
+TOKENS = ["python", "java", "script", "machine", "learning", "deep", "aws", "lambda", "sql", "data", "c++", "node.js", "ci/cd"]
+
+
+def first_hit_status(jd_skill, cv_skills):
+    # the matching loop SkillIndex replaced: first exact or >= 30% overlap hit wins
+    jd = skill_key(jd_skill)
+    jd_tokens = set(jd.split())
+    for cv_skill in cv_skills:
+        cv = skill_key(cv_skill)
+        if jd == cv:
+            return "Yes", "No"
+        overlap = jd_tokens & set(cv.split())
+        if overlap and len(overlap) / len(jd_tokens) >= 0.3:
+            return "Partial", "Yes"
+    return "No", "Yes"
+
+def random_skill(rng):
+    words = rng.sample(TOKENS, rng.randint(1, 4))
+    skill = rng.choice([" ", "-", "_", "  "]).join(words)
+    return skill.upper() if rng.random() < 0.2 else skill
+
+def random_cv(rng):
+    return [random_skill(rng) for _ in range(rng.randint(0, 12))]
+
+
+def test_skill_index_matches_first_hit_loop():
+    rng = random.Random(5)
+    for _ in range(2000):
+        cv_skills = random_cv(rng)
+        jd_skill = random_skill(rng) if rng.random() < 0.7 or not cv_skills else rng.choice(cv_skills)
+        assert SkillIndex(cv_skills).match(jd_skill) == first_hit_status(jd_skill, cv_skills)
+
+def test_skill_matrix_matches_skill_index():
+    rng = random.Random(7)
+    cvs = [random_cv(rng) for _ in range(200)]
+    jd_skills = [random_skill(rng) for _ in range(15)]
+    statuses = SkillMatrix(cvs).statuses(jd_skills)
+    for cv_skills, row in zip(cvs, statuses):
+        index = SkillIndex(cv_skills)
+        assert row == [index.match(skill)[0] for skill in jd_skills]
+
+def test_synonyms_apply_to_matching():
+    cv = {"skills": {"tools_and_platforms": ["Amazon Web Services", "DRF"]}}
+    assert SkillIndex(cv).match("AWS") == ("Yes", "No")
+    assert SkillIndex(cv).match("django") == ("Yes", "No")
+    assert SkillMatrix([cv]).statuses(["aws", "Django"]) == [["Yes", "Yes"]]
@@ -1,3 +1,12 @@
+SKILL_CATEGORIES = [
+    "programming_languages",
+    "frameworks_and_libraries",
+    "tools_and_platforms",
+    "domain_knowledge",
+    "technical_concepts",
+    "soft_skills"
+]
+
 KNOWN_SKILL_WORDS = [
     "api", "apis",
     "architecture",
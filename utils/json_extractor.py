@@ -1,6 +1,177 @@
+import json
 import re
-def extract_json_block(text):
-    pattern = r'```json\s*(.*?)\s*```'
-    matches = re.findall(pattern, text, re.DOTALL)
 
-    return f"```json\n{matches[-1]}\n```"
\ No newline at end of file
+from utils.constants import SKILL_CATEGORIES
+
+# the only characters that change the nesting state, everything else is skipped
+_SIGNIFICANT = re.compile(r"[{}\"'\\]")
+_FENCE = "```json"
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _value_position(text, pos):
+    # a single quote opens a string only where a key or value can start,
+    # so apostrophes in prose are left alone
+    j = pos - 1
+    while j >= 0 and text[j] in " \t\r\n":
+        j -= 1
+    return j < 0 or text[j] in "{[,:"
+
+def _scan_json_object(text):
+    depth, quote, start, last, escaped_at = 0, None, -1, None, -1
+    for m in _SIGNIFICANT.finditer(text):
+        char, pos = m.group(), m.start()
+        if quote:
+            if pos == escaped_at:
+                continue
+            if char == "\\":
+                escaped_at = pos + 1
+            elif char == quote:
+                quote = None
+            continue
+        if char == "{":
+            if depth == 0:
+                start = pos
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                last = (start, pos + 1)
+        elif depth and (char == '"' or (char == "'" and _value_position(text, pos))):
+            quote = char
+
+    if depth:
+        return text[start:]
+    if last is None:
+        raise ValueError("No JSON object found in model output")
+    return text[last[0]:last[1]]
+
+def find_json_object(text):
+    """The last top-level {...} in text; an object cut off at the end of text runs to the end.
+
+    The last ```json fence is searched first, so an unmatched brace in the
+    echoed prompt (the CV or JD text) cannot swallow a fenced answer.
+    """
+    fence = text.rfind(_FENCE)
+    if fence != -1:
+        body = text[fence + len(_FENCE):]
+        end = body.find("```")
+        try:
+            return _scan_json_object(body if end == -1 else body[:end])
+        except ValueError:
+            pass
+    return _scan_json_object(text)
+
+def _strip_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+def repair_json(candidate):
+    """Fix single quotes, trailing commas, Python literals and an object cut off mid-way."""
+    out, stack = [], []
+    quote, string_start, last_string = None, 0, None
+    i, n = 0, len(candidate)
+
+    while i < n:
+        char = candidate[i]
+        if quote:
+            if char == "\\" and i + 1 < n:
+                escaped = candidate[i + 1]
+                out.append("'" if quote == "'" and escaped == "'" else char + escaped)
+                i += 2
+                continue
+            if char == quote:
+                out.append('"')
+                quote, last_string = None, (string_start, len(out))
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+        elif char in "\"'":
+            quote, string_start = char, len(out)
+            out.append('"')
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            # close whatever the model forgot, e.g. the ] in {"a": [1}
+            while stack and stack[-1] != char:
+                out.append(stack.pop())
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+        elif char.isalpha():
+            j = i
+            while j < n and (candidate[j].isalnum() or candidate[j] == "_"):
+                j += 1
+            word = candidate[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    if stack:
+        # generation stopped mid-object: drop the half-written string,
+        # a key with no value, then close everything that is still open
+        if quote:
+            del out[string_start:]
+        _strip_trailing_comma(out)
+        if stack[-1] == "}" and last_string is not None and last_string[1] == len(out):
+            before = "".join(out[:last_string[0]]).rstrip()
+            if before.endswith(("{", ",")):
+                del out[last_string[0]:]
+                _strip_trailing_comma(out)
+        if out and out[-1] == ":":
+            out.append("null")
+        while stack:
+            _strip_trailing_comma(out)
+            out.append(stack.pop())
+
+    return "".join(out)
+
+def parse_json_object(text):
+    """Parse the last JSON object in raw model output, repairing it when json.loads refuses it."""
+    candidate = find_json_object(text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(candidate))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Model output is not valid JSON: {e}") from e
+
+def validate_skills(output, section="skills"):
+    """{"skills": {category: [str, ...]}} with all six categories, from output[section]."""
+    skills = output.get(section) if isinstance(output, dict) else None
+    # a flat list is kept the way ensure_skills_dict keeps it
+    if isinstance(skills, list):
+        skills = {"technical_concepts": skills}
+    if not isinstance(skills, dict):
+        raise ValueError(f"Model output has no {section!r} object")
+
+    result = {}
+    for category in SKILL_CATEGORIES:
+        values = skills.get(category) or []
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list):
+            raise ValueError(f"{section}.{category} is not a list")
+        result[category] = [v.strip() for v in values if isinstance(v, str) and v.strip()]
+    return {"skills": result}
+
+def parse_skills_response(text, section="skills"):
+    return validate_skills(parse_json_object(text), section)
+
+def extract_json_block(text):
+    # kept for callers that feed a langchain output parser
+    return f"```json\n{find_json_object(text)}\n```"
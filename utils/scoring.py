@@ -0,0 +1,151 @@
+import json
+import os
+
+import numpy as np
+
+from utils.constants import SKILL_CATEGORIES
+
+# JSON file with any of "status", "category" and "requirement" to replace the defaults below
+SCORING_WEIGHTS_PATH = os.environ.get("SCORING_WEIGHTS_PATH")
+
+# integer codes of the match arrays (SkillMatrix, CandidateStore)
+NO, PARTIAL, YES, SEMANTIC = 0, 1, 2, 3
+STATUS_CODES = {"No": NO, "Partial": PARTIAL, "Yes": YES, "Semantic": SEMANTIC}
+CATEGORY_CODES = {category: i for i, category in enumerate(SKILL_CATEGORIES)}
+REQUIRED, NICE_TO_HAVE = 0, 1
+# a category outside the six is weighted like this one, in every scoring path
+FALLBACK_CATEGORY = "technical_concepts"
+
+DEFAULT_WEIGHTS = {
+    "status": {"Yes": 1.0, "Partial": 0.5, "Semantic": 0.5, "No": 0.0},
+    "category": {
+        "programming_languages": 1.5,
+        "frameworks_and_libraries": 1.25,
+        "tools_and_platforms": 1.0,
+        "domain_knowledge": 1.0,
+        "technical_concepts": 1.0,
+        "soft_skills": 0.5,
+    },
+    "requirement": {"required": 1.0, "nice_to_have": 0.5},
+}
+
+# the only copy of the score thresholds
+DECISIONS = (
+    (80, "Strong Fit 💪"),
+    (65, "Good Fit 👍"),
+    (0, "Needs Improvement ⚠️"),
+)
+RECOMMENDATIONS = (
+    (75, "✅ Strong fit for the role"),
+    (50, "⚠️ Partial fit – candidate needs skill improvement"),
+    (0, "❌ Not a good fit for this role"),
+)
+
+
+def _label(score, thresholds):
+    for minimum, label in thresholds:
+        if score >= minimum:
+            return label
+    return thresholds[-1][1]
+
+def decision_for(score):
+    return _label(score, DECISIONS)
+
+def recommendation_for(score):
+    return _label(score, RECOMMENDATIONS)
+
+def _table(defaults, overrides, name):
+    unknown = set(overrides or {}) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown {name} weights: {sorted(unknown)}")
+    return {**defaults, **(overrides or {})}
+
+
+class ScoringWeights:
+    """Weight tables indexed by the integer codes above.
+
+    Each JD skill counts for its category weight times its requirement weight;
+    a CV earns the status weight of its match on that skill. The score is the
+    earned share of the total, in percent.
+    """
+
+    def __init__(self, status=None, category=None, requirement=None):
+        status = _table(DEFAULT_WEIGHTS["status"], status, "status")
+        category = _table(DEFAULT_WEIGHTS["category"], category, "category")
+        requirement = _table(DEFAULT_WEIGHTS["requirement"], requirement, "requirement")
+
+        self.status = np.zeros(len(STATUS_CODES), dtype=np.float64)
+        for name, code in STATUS_CODES.items():
+            self.status[code] = float(status[name])
+        self.category = np.asarray([float(category[c]) for c in SKILL_CATEGORIES], dtype=np.float64)
+        self.requirement = np.asarray([float(requirement["required"]), float(requirement["nice_to_have"])], dtype=np.float64)
+        # plain floats for the one-table path, numpy costs more than it saves on 20 rows
+        self._status = {name: float(status[name]) for name in STATUS_CODES}
+        self._category = {c: float(category[c]) for c in SKILL_CATEGORIES}
+        self._requirement = (float(requirement["required"]), float(requirement["nice_to_have"]))
+
+    @classmethod
+    def from_dict(cls, weights):
+        unknown = set(weights) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"unknown weight tables: {sorted(unknown)}")
+        return cls(**weights)
+
+    def status_weight(self, present):
+        return self._status[present]
+
+    def skill_weight(self, category, required=True):
+        category_weight = self._category.get(category, self._category[FALLBACK_CATEGORY])
+        return category_weight * self._requirement[REQUIRED if required else NICE_TO_HAVE]
+
+    def score_rows(self, matching_table):
+        """Score of one matching table (rows of build_matching_table), in percent."""
+        earned = total = 0.0
+        for row in matching_table:
+            weight = self.skill_weight(row.get("Category"), row.get("Required", True))
+            total += weight
+            earned += weight * self._status[row["Present"]]
+        return round(earned / total * 100, 2) if total else 0.0
+
+    def skill_weights(self, category_codes, requirement_codes):
+        """Weight of each JD skill from arrays of CATEGORY_CODES and REQUIRED/NICE_TO_HAVE."""
+        return self.category[np.asarray(category_codes)] * self.requirement[np.asarray(requirement_codes)]
+
+    def score_matrix(self, status_codes, skill_weights):
+        """Scores of every CV from an (n_cvs, n_jd_skills) array of status codes, in one product."""
+        total = skill_weights.sum()
+        if not total:
+            return np.zeros(status_codes.shape[0])
+        return np.round(self.status[status_codes] @ skill_weights / total * 100, 2)
+
+
+def jd_skill_codes(jd_skills):
+    """(skills, category codes, requirement codes) of a JD skills dict, in build_matching_table order."""
+    nice_to_have = {skill.lower() for skill in jd_skills.get("nice_to_have", ())}
+    skills, categories, requirements = [], [], []
+    for category, category_skills in jd_skills["skills"].items():
+        for skill in category_skills:
+            skills.append(skill)
+            categories.append(CATEGORY_CODES.get(category, CATEGORY_CODES[FALLBACK_CATEGORY]))
+            requirements.append(NICE_TO_HAVE if skill.lower() in nice_to_have else REQUIRED)
+    return skills, np.asarray(categories, dtype=np.int8), np.asarray(requirements, dtype=np.int8)
+
+# set by load_scoring_weights below
+_scoring_weights = None
+
+def get_scoring_weights():
+    """The weights of a request that brings none: SCORING_WEIGHTS_PATH when set, else DEFAULT_WEIGHTS."""
+    return _scoring_weights
+
+def load_scoring_weights(path=None):
+    """Use the tables in a JSON file, or the defaults without one, from now on."""
+    global _scoring_weights
+    if path:
+        with open(path, encoding="utf-8") as f:
+            weights = ScoringWeights.from_dict(json.load(f))
+    else:
+        weights = ScoringWeights()
+    _scoring_weights = weights
+    return weights
+
+load_scoring_weights(SCORING_WEIGHTS_PATH)
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from utils.constants import SKILL_SYNONYMS
+
+SEMANTIC_MATCHING = os.environ.get("SEMANTIC_MATCHING", "0") == "1"
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_STORE_PATH = os.environ.get("EMBEDDING_STORE_PATH", ".cache/skill_vectors")
+SEMANTIC_THRESHOLD = float(os.environ.get("SEMANTIC_MATCH_THRESHOLD", "0.75"))
+# new embeddings are written to disk once this many have piled up
+AUTOSAVE_EVERY = 256
+
+
+def _key(skill):
+    return " ".join(skill.lower().split())
+
+
+class EmbeddingStore:
+    """Unit-norm skill embeddings kept in a memory-mapped ``vectors.npy``.
+
+    ``skills.json`` next to it lists the skill string of every row. Skills not
+    in the file are embedded in one batch on first use and kept in memory until
+    ``save`` (or the AUTOSAVE_EVERY-th new skill) appends them to the file.
+    """
+
+    def __init__(self, path=EMBEDDING_STORE_PATH, model_name=EMBEDDING_MODEL_NAME):
+        self.path = path
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self.rows = {}
+        self.vectors = None
+        self.pending = {}
+        self._load()
+
+    def _load(self):
+        meta_path = os.path.join(self.path, "skills.json")
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        if not (os.path.exists(meta_path) and os.path.exists(vectors_path)):
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        # vectors from another model are not comparable, start over
+        if meta.get("model") != self.model_name:
+            return
+        self.vectors = np.load(vectors_path, mmap_mode="r")
+        self.rows = {skill: i for i, skill in enumerate(meta["skills"])}
+
+    def _encoder(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def embed(self, skills):
+        """Return an (n, dim) array of unit vectors, one row per skill."""
+        keys = [_key(skill) for skill in skills]
+        with self._lock:
+            missing = sorted({k for k in keys if k not in self.rows and k not in self.pending})
+            if missing:
+                vectors = self._encoder().encode(missing, batch_size=64, normalize_embeddings=True)
+                self.pending.update(zip(missing, np.asarray(vectors, dtype=np.float32)))
+
+            if not keys:
+                return np.zeros((0, self.dim()), dtype=np.float32)
+            result = np.stack([
+                self.vectors[self.rows[k]] if k in self.rows else self.pending[k]
+                for k in keys
+            ])
+            if len(self.pending) >= AUTOSAVE_EVERY:
+                self._save()
+            return result
+
+    def dim(self):
+        if self.vectors is not None:
+            return self.vectors.shape[1]
+        return self._encoder().get_sentence_embedding_dimension()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        if not self.pending:
+            return
+        skills = sorted(self.rows, key=self.rows.get) + list(self.pending)
+        parts = [] if self.vectors is None else [np.asarray(self.vectors)]
+        parts.append(np.stack(list(self.pending.values())))
+        vectors = np.concatenate(parts).astype(np.float32)
+
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        np.save(vectors_path + ".tmp.npy", vectors)
+        os.replace(vectors_path + ".tmp.npy", vectors_path)
+        with open(os.path.join(self.path, "skills.json"), "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "skills": skills}, f)
+
+        self.vectors = np.load(vectors_path, mmap_mode="r")
+        self.rows = {skill: i for i, skill in enumerate(skills)}
+        self.pending = {}
+
+
+class SemanticMatcher:
+    """Finds JD skills that have a CV skill with cosine similarity >= threshold."""
+
+    def __init__(self, store, threshold=SEMANTIC_THRESHOLD):
+        self.store = store
+        self.threshold = threshold
+
+    def match(self, jd_skills, cv_skills):
+        """Return one bool per JD skill, using a single similarity matrix."""
+        jd_skills, cv_skills = list(jd_skills), list(cv_skills)
+        if not jd_skills or not cv_skills:
+            return [False] * len(jd_skills)
+
+        vectors = self.store.embed(jd_skills + cv_skills)
+        similarity = vectors[:len(jd_skills)] @ vectors[len(jd_skills):].T
+        return (similarity.max(axis=1) >= self.threshold).tolist()
+
+
+def canonical_skills():
+    skills = set()
+    for canonical, aliases in SKILL_SYNONYMS.items():
+        skills.add(canonical)
+        skills.update(aliases)
+    return sorted(skills)
+
+def precompute_skill_vectors(store=None):
+    """Embed the canonical skill vocabulary and write it to the store."""
+    store = store or EmbeddingStore()
+    store.embed(canonical_skills())
+    store.save()
+    return store
+
+
+_semantic_matcher = None
+
+def get_semantic_matcher():
+    """Shared matcher when SEMANTIC_MATCHING=1, otherwise None."""
+    global _semantic_matcher
+    if not SEMANTIC_MATCHING:
+        return None
+    if _semantic_matcher is None:
+        _semantic_matcher = SemanticMatcher(EmbeddingStore())
+    return _semantic_matcher
+
+
+if __name__ == "__main__":
+    store = precompute_skill_vectors()
+    print(f"{len(store.rows)} skill vectors saved to {store.path}")
@@ -0,0 +1,95 @@
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from utils.scoring import NO, PARTIAL, YES, get_scoring_weights, jd_skill_codes
+from utils.text_utils import SkillIndex, iter_skills, matchable_skills, skill_key
+
+# codes returned by SkillMatrix.match
+STATUS = {NO: "No", PARTIAL: "Partial", YES: "Yes"}
+
+
+class SkillMatrix:
+    """Skills of many CVs as one token-incidence matrix.
+
+    Scores one JD against every CV with a single matrix product, giving the same
+    Yes/Partial/No answer as ``SkillIndex.match`` for each CV. Uses a scipy
+    sparse matrix when scipy is installed, a dense NumPy array otherwise.
+    """
+
+    def __init__(self, cv_skills_list):
+        self.vocab = {}
+        self.skill_ids = {}
+        entry_skill, rows, cols = [], [], []
+        self.offsets = [0]
+
+        for cv_skills in cv_skills_list:
+            for skill in SkillIndex(cv_skills).skills:
+                entry = len(entry_skill)
+                entry_skill.append(self.skill_ids.setdefault(skill, len(self.skill_ids)))
+                for token in set(skill.split()):
+                    rows.append(entry)
+                    cols.append(self.vocab.setdefault(token, len(self.vocab)))
+            self.offsets.append(len(entry_skill))
+
+        self.entry_skill = np.asarray(entry_skill, dtype=np.int64)
+        shape = (len(entry_skill), len(self.vocab))
+        data = np.ones(len(rows), dtype=np.float64)
+        if sparse is not None:
+            self.matrix = sparse.csr_matrix((data, (rows, cols)), shape=shape)
+        else:
+            self.matrix = np.zeros(shape, dtype=np.float64)
+            self.matrix[rows, cols] = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def match(self, jd_skills):
+        """Return an int array of shape (n_cvs, n_jd_skills) holding NO/PARTIAL/YES."""
+        if isinstance(jd_skills, dict):
+            jd_skills = list(iter_skills(jd_skills))
+        jd_norm = [skill_key(skill) for skill in jd_skills]
+        n_cvs, n_jd, n_entries = len(self), len(jd_norm), len(self.entry_skill)
+
+        jd_matrix = np.zeros((len(self.vocab), n_jd), dtype=np.float64)
+        jd_lengths = np.zeros(n_jd, dtype=np.float64)
+        for j, skill in enumerate(jd_norm):
+            tokens = set(skill.split())
+            jd_lengths[j] = len(tokens)
+            for token in tokens:
+                if token in self.vocab:
+                    jd_matrix[self.vocab[token], j] = 1.0
+
+        codes = np.full((n_cvs, n_jd), NO, dtype=np.int8)
+        if n_entries == 0 or n_jd == 0:
+            return codes
+
+        overlap = np.asarray(self.matrix @ jd_matrix)
+        ratio = np.divide(overlap, jd_lengths, out=np.zeros_like(overlap), where=jd_lengths > 0)
+        partial = (overlap > 0) & (ratio >= 0.3)
+
+        jd_ids = np.asarray([self.skill_ids.get(skill, -1) for skill in jd_norm], dtype=np.int64)
+        exact = self.entry_skill[:, None] == jd_ids[None, :]
+
+        # first hit per CV, in the CV's own skill order
+        hit_at = np.where(partial | exact, np.arange(n_entries)[:, None], n_entries)
+        starts = np.asarray(self.offsets[:-1])
+        non_empty = np.flatnonzero(np.diff(self.offsets) > 0)
+        first = np.minimum.reduceat(hit_at, starts[non_empty], axis=0)
+
+        found = first < n_entries
+        first_exact = exact[np.minimum(first, n_entries - 1), np.arange(n_jd)[None, :]]
+        codes[non_empty] = np.where(found, np.where(first_exact, YES, PARTIAL), NO)
+        return codes
+
+    def statuses(self, jd_skills):
+        return [[STATUS[code] for code in row] for row in self.match(jd_skills).tolist()]
+
+    def score(self, jd_skills, weights=None):
+        """Weighted score of every CV against a JD skills dict, like build_matching_report without the semantic tier."""
+        weights = weights or get_scoring_weights()
+        skills, categories, requirements = jd_skill_codes(matchable_skills(jd_skills))
+        return weights.score_matrix(self.match(skills), weights.skill_weights(categories, requirements))
@@ -0,0 +1,56 @@
+import re
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+
+
+def _split_unit(unit, max_tokens, count_tokens):
+    # paragraphs that are too long fall back to lines, then to words
+    if count_tokens(unit) <= max_tokens:
+        return [unit]
+    lines = unit.split("\n")
+    if len(lines) > 1:
+        return [part for line in lines if line.strip() for part in _split_unit(line, max_tokens, count_tokens)]
+
+    words, parts, current = unit.split(), [], []
+    for word in words:
+        if current and count_tokens(" ".join(current + [word])) > max_tokens:
+            parts.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+def chunk_text(text, max_tokens, overlap_tokens=0, count_tokens=None):
+    """Split text into chunks of at most max_tokens, on paragraph boundaries where possible.
+
+    Consecutive chunks share up to overlap_tokens of trailing text so a skill
+    list cut at a boundary still appears whole in one of them.
+    """
+    count_tokens = count_tokens or (lambda s: len(s) // 4 + 1)
+    units = [
+        part
+        for paragraph in _PARAGRAPHS.split(text)
+        if paragraph.strip()
+        for part in _split_unit(paragraph.strip(), max_tokens, count_tokens)
+    ]
+
+    chunks, current, size = [], [], 0
+    for unit in units:
+        unit_size = count_tokens(unit)
+        if current and size + unit_size > max_tokens:
+            chunks.append("\n\n".join(current))
+            # carry the tail of this chunk into the next one
+            carried, carried_size = [], 0
+            for previous in reversed(current):
+                previous_size = count_tokens(previous)
+                if carried_size + previous_size > overlap_tokens or carried_size + previous_size + unit_size > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_size += previous_size
+            current, size = carried, carried_size
+        current.append(unit)
+        size += unit_size
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
@@ -1,5 +1,69 @@
+import json
+import os
 import re
-from utils.constants import KNOWN_SKILL_WORDS
+import zlib
+from functools import lru_cache
+from utils.constants import KNOWN_SKILL_WORDS, SKILL_SYNONYMS
+from utils.scoring import get_scoring_weights, decision_for, recommendation_for
+
+# optional JSON file with extra "known_skill_words" and "skill_synonyms"
+SKILL_VOCABULARY_PATH = os.environ.get("SKILL_VOCABULARY_PATH")
+
+def _trie_pattern(words):
+    # nest the words as a trie so the regex walks one branch per character
+    # instead of trying every word at every position
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def to_regex(node):
+        end = "" in node
+        branches = [re.escape(ch) + to_regex(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if end else body
+
+    return to_regex(trie)
+
+def _build_split_regex(words):
+    words = sorted({word.lower() for word in words if word})
+    if not words:
+        return None
+    # the lookahead+backreference keeps the longest word only, like an atomic group
+    return re.compile(rf"(?<!\s)(?=({_trie_pattern(words)}))\1(?!\s)")
+
+def _build_aliases(synonyms):
+    aliases = {}
+    for canonical, names in synonyms.items():
+        aliases[normalize_skill(canonical)] = canonical
+        for name in names:
+            aliases.setdefault(normalize_skill(name), canonical)
+    return aliases
+
+def load_skill_vocabulary(path=None):
+    """Rebuild the split regex and alias table from the constants plus an optional JSON file."""
+    global SPLIT_REGEX, SKILL_ALIASES
+    words = list(KNOWN_SKILL_WORDS)
+    synonyms = dict(SKILL_SYNONYMS)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        words += vocabulary.get("known_skill_words", [])
+        for canonical, names in vocabulary.get("skill_synonyms", {}).items():
+            synonyms[canonical] = list(synonyms.get(canonical, [])) + list(names)
+
+    SPLIT_REGEX = _build_split_regex(words)
+    SKILL_ALIASES = _build_aliases(synonyms)
+    canonicalize.cache_clear()
+    skill_key.cache_clear()
+
+_SPACES = re.compile(r"\s+")
+_SYMBOLS = re.compile(r"[^\w\s]")
+
 def smart_split(skill: str) -> str:
     skill = skill.lower().strip()
 
@@ -7,110 +71,172 @@ def smart_split(skill: str) -> str:
     skill = skill.replace("datastuctures", "data structures")
 
     # split known words
-    for word in KNOWN_SKILL_WORDS:
-        skill = re.sub(
-            rf"(?<!\s)({word})(?!\s)",
-            r" \1 ",
-            skill
-        )
+    if SPLIT_REGEX is not None:
+        skill = SPLIT_REGEX.sub(r" \1 ", skill)
 
     # clean extra spaces
-    skill = re.sub(r"\s+", " ", skill).strip()
+    skill = _SPACES.sub(" ", skill).strip()
     return skill
 
+@lru_cache(maxsize=65536)
+def canonicalize(skill: str) -> str:
+    skill = smart_split(skill)
+    return SKILL_ALIASES.get(normalize_skill(skill), skill)
+
+@lru_cache(maxsize=65536)
+def skill_key(skill: str) -> str:
+    """What CV and JD skills are matched on: the canonical name, lower case, without symbols."""
+    return normalize_skill(canonicalize(skill))
+
+def skill_key_version():
+    # changes whenever the split words or aliases do, so stored keys can be rebuilt
+    tables = json.dumps([SPLIT_REGEX.pattern if SPLIT_REGEX is not None else "", sorted(SKILL_ALIASES.items())])
+    return zlib.crc32(tables.encode("utf-8")) & 0x7FFFFFFF
+
 def normalize_skills_output(skills_output: dict):
     for category, skills in skills_output["skills"].items():
         skills_output["skills"][category] = sorted(
-            set(smart_split(skill) for skill in skills)
+            set(canonicalize(skill) for skill in skills)
         )
     return skills_output
 
-import re
-
 def normalize_skill(skill: str) -> str:
     skill = skill.lower()
-    skill = re.sub(r"[^\w\s]", " ", skill)   # remove symbols
-    skill = re.sub(r"_", " ", skill)
-    skill = re.sub(r"\s+", " ", skill).strip()
+    skill = _SYMBOLS.sub(" ", skill)   # remove symbols
+    skill = skill.replace("_", " ")
+    skill = _SPACES.sub(" ", skill).strip()
     return skill
 
+load_skill_vocabulary(SKILL_VOCABULARY_PATH)
+
 def flatten_skills(skills_dict):
     all_skills = []
     for category, skills in skills_dict["skills"].items():
         for skill in skills:
-            all_skills.append(normalize_skill(skill))
+            all_skills.append(skill_key(skill))
     return set(all_skills)
 
-def skill_match_status(jd_skill, cv_skills):
-    jd = normalize_skill(jd_skill)
-    jd_tokens = set(jd.split())
+def iter_skills(skills_dict):
+    for category, skills in skills_dict["skills"].items():
+        for skill in skills:
+            yield skill
+
+def matchable_skills(jd_skills):
+    """jd_skills without the skills whose skill_key is empty ("+++", "-"), which nothing can match."""
+    return {
+        **jd_skills,
+        "skills": {
+            category: [skill for skill in skills if skill_key(skill)]
+            for category, skills in jd_skills["skills"].items()
+        }
+    }
 
-    for cv_skill in cv_skills:
-        cv = normalize_skill(cv_skill)
-        cv_tokens = set(cv.split())
+class SkillIndex:
+    """CV skills reduced to their skill_key once, with an exact-match table and token postings.
+
+    Matching a JD skill only touches the CV skills that share a token with it,
+    instead of re-normalizing every CV skill for every JD skill.
+    """
+
+    def __init__(self, cv_skills):
+        if isinstance(cv_skills, dict):
+            cv_skills = iter_skills(cv_skills)
+
+        self.skills = [skill_key(skill) for skill in cv_skills]
+        self.exact = {}
+        self.postings = {}
+        for i, skill in enumerate(self.skills):
+            self.exact.setdefault(skill, i)
+            for token in set(skill.split()):
+                self.postings.setdefault(token, []).append(i)
+
+    def match(self, jd_skill):
+        # same answer as walking the CV skills in order and stopping at the
+        # first exact (Yes) or >= 30% token overlap (Partial) hit
+        jd = skill_key(jd_skill)
+        jd_tokens = set(jd.split())
+        exact = self.exact.get(jd)
+
+        overlaps = {}
+        for token in jd_tokens:
+            for i in self.postings.get(token, ()):
+                overlaps[i] = overlaps.get(i, 0) + 1
+        partial = min(
+            (i for i, overlap in overlaps.items() if overlap / len(jd_tokens) >= 0.3),
+            default=None
+        )
 
-        # exact
-        if jd == cv:
+        if exact is not None and (partial is None or exact <= partial):
             return "Yes", "No"
-
-        # partial
-        overlap = jd_tokens & cv_tokens
-        if overlap and len(overlap) / len(jd_tokens) >= 0.3:
+        if partial is not None:
             return "Partial", "Yes"
+        return "No", "Yes"
 
-    return "No", "Yes"
+def skill_match_status(jd_skill, cv_skills):
+    index = cv_skills if isinstance(cv_skills, SkillIndex) else SkillIndex(cv_skills)
+    return index.match(jd_skill)
 
-def build_matching_table(jd_skills, cv_skills):
+def build_matching_table(jd_skills, cv_skills, semantic_matcher=None):
     table = []
+    cv_index = SkillIndex(cv_skills)
+    # filled by mark_nice_to_have, a JD without it counts every skill as required
+    nice_to_have = {skill.lower() for skill in jd_skills.get("nice_to_have", ())}
 
-    for category, skills in jd_skills["skills"].items():
+    for category, skills in matchable_skills(jd_skills)["skills"].items():
         for skill in skills:
-            
-            present, needs_improvement = skill_match_status(
-                skill,          
-                cv_skills
-            )
+            present, needs_improvement = cv_index.match(skill)
 
             table.append({
                 "Skill": skill.title(),
                 "Present": present,
-                "Needs_Improvement": needs_improvement
+                "Needs_Improvement": needs_improvement,
+                "Category": category,
+                "Required": skill.lower() not in nice_to_have
             })
 
-    return table
-
-def calculate_score(matching_table):
-    score = 0
-    max_score = len(matching_table)
+    # skills with no token overlap get one more chance through embeddings
+    if semantic_matcher is not None:
+        missing = [row for row in table if row["Present"] == "No"]
+        matched = semantic_matcher.match([row["Skill"] for row in missing], cv_index.skills)
+        for row, is_match in zip(missing, matched):
+            if is_match:
+                row["Present"] = "Semantic"
 
-    for row in matching_table:
-        if row["Present"] == "Yes":
-            score += 1
-        elif row["Present"] == "Partial":
-            score += 0.5
+    return table
 
-    percentage = round((score / max_score) * 100, 2)
+def calculate_score(matching_table, weights=None):
+    weights = weights or get_scoring_weights()
+    percentage = weights.score_rows(matching_table)
 
-    decision = "Good Fit ✅" if percentage >= 70 else "Needs Improvement ⚠️"
+    decision = decision_for(percentage)
 
     return percentage, decision
 
-import pandas as pd
-
+STATUS_LABELS = {
+    "Yes": "✅ Match",
+    "Partial": "🟡 Partial Match",
+    "Semantic": "🔵 Related Skill",
+    "No": "❌ Missing"
+}
+
+SUMMARY_LABELS = {
+    "Yes": "Matched",
+    "Partial": "Partial Match",
+    "Semantic": "Related Skill",
+    "No": "Missing"
+}
+
+# DataFrame versions of the report, for the Streamlit display
 def matching_to_dataframe(matching_results):
+    # pandas is imported here so the API never pays for it
+    import pandas as pd
     df = pd.DataFrame(matching_results)
     return df
 
 def prettify_matching_df(df):
     df = df.copy()
 
-    status_map = {
-        "Yes": "✅ Match",
-        "Partial": "🟡 Partial Match",
-        "No": "❌ Missing"
-    }
-
-    df["Status"] = df["Present"].map(status_map)
+    df["Status"] = df["Present"].map(STATUS_LABELS)
     df["Action Needed"] = df["Present"].apply(
         lambda x: "No Action Needed" if x == "Yes" else "Improve / Learn"
     )
@@ -119,59 +245,86 @@ def prettify_matching_df(df):
 
     return df[["Skill", "Status", "Action Needed"]]
 
-def calculate_match_score(df):
-    weights = {
-        "Yes": 1.0,
-        "Partial": 0.5,
-        "No": 0.0
-    }
-
-    df["Score"] = df["Present"].map(weights)
+def calculate_match_score(df, weights=None):
+    weights = weights or get_scoring_weights()
+    df["Score"] = df["Present"].map(weights.status_weight)
 
-    final_score = round(df["Score"].mean() * 100, 2)
+    final_score = weights.score_rows(df.to_dict("records"))
     return final_score
 
 def generate_recommendation(match_score):
-    if match_score >= 75:
-        return "✅ Strong fit for the role"
-    elif match_score >= 50:
-        return "⚠️ Partial fit – candidate needs skill improvement"
-    else:
-        return "❌ Not a good fit for this role"
+    return recommendation_for(match_score)
     
 def generate_summary_df(df):
     summary = df["Present"].value_counts().reset_index()
     summary.columns = ["Match Type", "Count"]
 
-    summary["Match Type"] = summary["Match Type"].map({
-        "Yes": "Matched",
-        "Partial": "Partial Match",
-        "No": "Missing"
-    })
+    summary["Match Type"] = summary["Match Type"].map(SUMMARY_LABELS)
 
     return summary
 
-def build_matching_report(matching_results):
-    raw_df = matching_to_dataframe(matching_results)
-    pretty_df = prettify_matching_df(raw_df)
-    score = calculate_match_score(raw_df)
-    recommendation=generate_recommendation(score)
-    summary_df = generate_summary_df(raw_df)
-
-    decision = (
-        "Strong Fit 💪" if score >= 80
-        else "Good Fit 👍" if score >= 65
-        else "Needs Improvement ⚠️"
-    )
+def build_matching_report(matching_results, weights=None):
+    """Score, pretty table and summary counts as plain lists and dicts, in one pass over the rows."""
+    weights = weights or get_scoring_weights()
+    matching_table = []
+    counts = {}
+    earned = total = 0.0
+
+    for row in matching_results:
+        present = row["Present"]
+        matching_table.append({
+            "Skill": row["Skill"].title(),
+            "Status": STATUS_LABELS[present],
+            "Action Needed": "No Action Needed" if present == "Yes" else "Improve / Learn"
+        })
+        counts[present] = counts.get(present, 0) + 1
+        weight = weights.skill_weight(row.get("Category"), row.get("Required", True))
+        total += weight
+        earned += weight * weights.status_weight(present)
+
+    score = round(earned / total * 100, 2) if total else 0.0
+    recommendation = recommendation_for(score)
+
+    # most frequent first, like value_counts
+    summary_table = [
+        {"Match Type": SUMMARY_LABELS[present], "Count": count}
+        for present, count in sorted(counts.items(), key=lambda item: -item[1])
+    ]
+
+    decision = decision_for(score)
 
     return {
         "final_score": score,
         "decision": decision,
-        "matching_table": pretty_df,
-        "summary_table": summary_df,
+        "matching_table": matching_table,
+        "summary_table": summary_table,
         "recommendation":recommendation
     }
 
+# compact report: JD skills grouped by status, labels and counts are left to the client
+STATUS_FIELDS = {
+    "Yes": "matched",
+    "Partial": "partial",
+    "Semantic": "related",
+    "No": "missing"
+}
+
+def build_compact_report(matching_results, weights=None):
+    """Score, decision and the JD skills grouped by match status; what the API sends."""
+    weights = weights or get_scoring_weights()
+    score = weights.score_rows(matching_results)
+
+    skills = {field: [] for field in STATUS_FIELDS.values()}
+    for row in matching_results:
+        skills[STATUS_FIELDS[row["Present"]]].append(row["Skill"].title())
+
+    return {
+        "final_score": score,
+        "decision": decision_for(score),
+        "recommendation": recommendation_for(score),
+        "skills": skills
+    }
+
 def ensure_skills_dict(skills_json: dict):
     empty_structure = {
         "programming_languages": [],
@@ -195,3 +348,16 @@ def ensure_skills_dict(skills_json: dict):
 
     return {"skills": empty_structure}
 
+def merge_skills_outputs(skills_outputs):
+    # plain union: skills keep the model's spelling, like a single-chunk output,
+    # so matching does not depend on how many chunks a document had
+    merged = ensure_skills_dict({})
+    seen = {category: set() for category in merged["skills"]}
+    for output in skills_outputs:
+        for category, skills in ensure_skills_dict(output)["skills"].items():
+            for skill in skills:
+                key = normalize_skill(skill)
+                if key not in seen[category]:
+                    seen[category].add(key)
+                    merged["skills"][category].append(skill)
+    return merged